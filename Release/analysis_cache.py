@@ -0,0 +1,101 @@
+# analysis_cache.py
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# (path, size, mtime_ns) -> content digest, so an unchanged file is hashed once per process
+_digest_memo = {}
+
+
+def file_digest(file_path, chunk_size=1024 * 1024):
+    st = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), st.st_size, st.st_mtime_ns)
+    digest = _digest_memo.get(memo_key)
+    if digest is None:
+        h = hashlib.blake2b(digest_size=20)
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+        _digest_memo[memo_key] = digest
+    return digest
+
+
+class AnalysisCache:
+    """
+    Content-addressed store of analysis results shared by all sessions.
+    Entries are keyed by a hash of the input data file and the analysis parameters,
+    stored as compressed .npz files, and evicted least-recently-used first once
+    the directory grows past max_bytes.
+    """
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, data_path, params):
+        h = hashlib.blake2b(digest_size=20)
+        h.update(file_digest(data_path).encode())
+        h.update(json.dumps(params, sort_keys=True, default=str).encode())
+        return h.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key):
+        """Returns (tables, metrics) for a cached entry, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                tables = {}
+                for name in json.loads(str(entry['__tables__'])):
+                    columns = json.loads(str(entry[f"{name}__columns"]))
+                    tables[name] = pd.DataFrame({
+                        column: self._decode_column(entry[f"{name}__{column}"]) for column in columns
+                    }, columns=columns)
+                metrics = json.loads(str(entry['__metrics__']))
+        except (OSError, KeyError, ValueError):
+            return None
+        os.utime(path)  # Mark as recently used
+        return tables, metrics
+
+    def put(self, key, tables, metrics):
+        arrays = {'__tables__': np.array(json.dumps(list(tables))),
+                  '__metrics__': np.array(json.dumps(metrics))}
+        for name, table in tables.items():
+            arrays[f"{name}__columns"] = np.array(json.dumps([str(c) for c in table.columns]))
+            for column in table.columns:
+                values = table[column].to_numpy()
+                arrays[f"{name}__{column}"] = values.astype(str) if values.dtype == object else values
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = self._entry_path(key) + '.tmp.npz'
+            np.savez_compressed(tmp_path, **arrays)
+            os.replace(tmp_path, self._entry_path(key))
+            self._evict()
+        except OSError as e:
+            print(f"Could not write analysis cache entry: {e}")
+
+    @staticmethod
+    def _decode_column(values):
+        return values.astype(object) if values.dtype.kind == 'U' else values
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz') and not name.endswith('.tmp.npz'):
+                st = os.stat(os.path.join(self.directory, name))
+                entries.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+                total -= size
+            except OSError:
+                pass
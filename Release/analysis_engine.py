@@ -0,0 +1,308 @@
+# analysis_engine.py
+"""
+The gaze analysis pipeline shared by the results window, the batch CLI and
+dyslexia_analysis:
+
+    load -> filters -> fixations -> saccades -> metrics -> interpretation
+
+Every stage is a small callable object working on dicts of NumPy arrays, so any
+of them can be swapped (e.g. another fixation detector) without touching the
+others. A stage's parameters() feed the analysis cache key.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from fixations import detect_fixations_idt, detect_fixations_ihmm, detect_fixations_ivt
+from gaze_io import load_gaze_arrays
+from saccades import (detect_saccades, saccade_metrics,
+                      SAME_LINE_DY, MIN_HORIZONTAL_DX, LINE_RETURN_DY)
+
+ENGINE_VERSION = 1  # Bump when stage outputs change so cached results are recomputed
+
+FIXATION_COLUMNS = ['start_idx', 'stop_idx', 'start_time', 'end_time', 'duration', 'x', 'y', 'count']
+SACCADE_COLUMNS = ['from_idx', 'to_idx', 'dx', 'dy', 'distance', 'duration', 'type']
+
+
+class Stage:
+    def parameters(self):
+        return {'stage': type(self).__name__, **vars(self)}
+
+
+# --- LOAD / FILTER ---
+class GazeFileLoader(Stage):
+    """Reads a gaze file into {'time', 'x', 'y'} arrays, time in seconds from the first sample."""
+    def __call__(self, file_path):
+        try:
+            times, xs, ys = load_gaze_arrays(file_path)
+        except Exception as e:
+            print(f"Error loading data: {e}")
+            times = xs = ys = np.empty(0)
+        times = np.asarray(times, dtype=float)
+        if len(times):
+            times = times - times[0]
+        return {'time': times, 'x': np.asarray(xs, dtype=float), 'y': np.asarray(ys, dtype=float)}
+
+
+# --- FIXATIONS ---
+class IDTFixations(Stage):
+    """
+    I-DT fixation detection. With include_break_sample the duration and centroid
+    also cover the sample that broke the dispersion window (the results window's
+    original definition).
+    """
+    def __init__(self, dispersion=0.05, duration_min=0.1, include_break_sample=False):
+        self.dispersion = dispersion
+        self.duration_min = duration_min
+        self.include_break_sample = include_break_sample
+
+    def __call__(self, samples):
+        return fixation_table(detect_fixations_idt(samples['time'], samples['x'], samples['y'],
+                                                   self.dispersion, self.duration_min, self.include_break_sample))
+
+
+class IVTFixations(Stage):
+    """I-VT fixation detection (velocity threshold, one vectorized pass)."""
+    def __init__(self, velocity_threshold=1.5, duration_min=0.1):
+        self.velocity_threshold = velocity_threshold
+        self.duration_min = duration_min
+
+    def __call__(self, samples):
+        return fixation_table(detect_fixations_ivt(samples['time'], samples['x'], samples['y'],
+                                                   self.velocity_threshold, self.duration_min))
+
+
+class IHMMFixations(Stage):
+    """I-HMM fixation detection (two-state hidden Markov model over gaze speed)."""
+    def __init__(self, velocity_threshold=1.5, duration_min=0.1, iterations=3):
+        self.velocity_threshold = velocity_threshold
+        self.duration_min = duration_min
+        self.iterations = iterations
+
+    def __call__(self, samples):
+        return fixation_table(detect_fixations_ihmm(samples['time'], samples['x'], samples['y'],
+                                                    self.velocity_threshold, self.duration_min, self.iterations))
+
+
+FIXATION_STAGES = {'idt': IDTFixations, 'ivt': IVTFixations, 'ihmm': IHMMFixations}
+
+
+def fixation_stage(method='idt', **params):
+    """Builds the fixation stage for method ('idt', 'ivt' or 'ihmm'); params go to its constructor."""
+    try:
+        return FIXATION_STAGES[method](**params)
+    except KeyError:
+        raise ValueError(f"Unknown fixation method '{method}', expected one of {sorted(FIXATION_STAGES)}")
+
+
+def fixation_table(records):
+    """Turns a list of fixation records (as returned by the detectors in fixations.py) into arrays."""
+    return {
+        name: np.array([r[name] for r in records],
+                       dtype=np.int64 if name in ('start_idx', 'stop_idx', 'count') else float)
+        for name in FIXATION_COLUMNS
+    }
+
+
+# --- SACCADES ---
+class SaccadeDetector(Stage):
+    """Movements between consecutive fixations, classified as in saccades.py."""
+    def parameters(self):
+        return dict(super().parameters(), thresholds=[SAME_LINE_DY, MIN_HORIZONTAL_DX, LINE_RETURN_DY])
+
+    def __call__(self, fixations):
+        saccades = detect_saccades(fixations['x'], fixations['y'],
+                                   fixations['start_time'], fixations['end_time'])
+        n = len(saccades['dx'])
+        return {
+            'from_idx': np.arange(n),
+            'to_idx': np.arange(1, n + 1),
+            'dx': saccades['dx'],
+            'dy': saccades['dy'],
+            'distance': saccades['distance'],
+            'duration': saccades['duration'],
+            'type': saccades['type']
+        }
+
+
+# --- METRICS ---
+class ReadingMetrics(Stage):
+    """Average fixation duration plus the saccade metrics of saccades.saccade_metrics."""
+    def __call__(self, fixations, saccades):
+        metrics = saccade_metrics(saccades['type'], saccades['distance'], saccades['dy'], saccades['duration'])
+        metrics['n_fixations'] = len(fixations['duration'])
+        metrics['avg_fixation_duration'] = fixations['duration'].mean()
+        return {name: float(value) for name, value in metrics.items()}
+
+
+def weighted_score(metrics, weights):
+    return sum(weight * metrics[name] for name, weight in weights.items())
+
+
+# --- INTERPRETATION ---
+class ScreeningReport(Stage):
+    """
+    The results window's report: {label: (value, unit, description)} for average
+    fixation, regression rate and the weighted risk score, with reference ranges.
+    """
+    def __init__(self, weights=None):
+        self.weights = weights or {'avg_fixation_duration': 15, 'regression_rate': 20, 'saccade_length_std': 10}
+
+    def __call__(self, metrics):
+        avg_fix = metrics['avg_fixation_duration']
+        reg_rate = metrics['regression_rate']
+        score = weighted_score(metrics, self.weights)
+
+        # 1. Regression Rate Logic
+        if reg_rate < 0.15:
+            reg_status = "Normal Range"
+        elif reg_rate < 0.25:
+            reg_status = "Moderate (Monitor)"
+        else:
+            reg_status = "High (Difficulty Indicator)"
+        reg_desc = f"{reg_status}\n[Ref: Normal < 15% | High > 25%]"
+
+        # 2. Fixation Logic
+        if avg_fix < 0.22:
+            fix_status = "Normal (Fast Processing)"
+        elif avg_fix < 0.32:
+            fix_status = "Moderate (Slower Decoding)"
+        else:
+            fix_status = "High (Processing Delay)"
+        fix_desc = f"{fix_status}\n[Ref: Normal < 0.22s | High > 0.32s]"
+
+        # 3. Score Logic
+        if score < 5.0:
+            score_status = "Low Risk (Fluent)"
+        elif score < 7.0:
+            score_status = "Moderate Risk"
+        else:
+            score_status = "High Risk"
+        score_desc = f"{score_status}\n[Ref: Low < 5.0 | High > 7.0]"
+
+        return {
+            "Average Fixation": (avg_fix, "s", fix_desc),
+            "Regression Rate": (reg_rate, "%", reg_desc),
+            "Dyslexia Risk Score": (score, "", score_desc)
+        }
+
+
+class DifficultySummary(Stage):
+    """dyslexia_analysis' flat report of the five core metrics and the composite difficulty score."""
+    def __init__(self, weights=None):
+        self.weights = weights or {'avg_fixation_duration': 10, 'regression_rate': 20, 'saccade_length_std': 5,
+                                   'line_noise': 10, 'speed_instability': 5}
+
+    def __call__(self, metrics):
+        return {
+            "Avg Fixation Duration (s)": metrics['avg_fixation_duration'],
+            "Regression Rate": metrics['regression_rate'],
+            "Saccade Length Var": metrics['saccade_length_std'],
+            "Line Noise (Y-Jitter)": metrics['line_noise'],
+            "Speed Instability": metrics['speed_instability'],
+            "READING DIFFICULTY SCORE": weighted_score(metrics, self.weights)
+        }
+
+
+# --- PIPELINE ---
+class AnalysisResult:
+    def __init__(self, samples):
+        self.samples = samples
+        self.fixations = fixation_table([])
+        self.saccades = {name: np.empty(0) for name in SACCADE_COLUMNS}
+        self.metrics = None
+        self.report = None      # Output of the interpretation stage; None when there is too little data
+        self.timings = {}       # Seconds per stage
+        self.from_cache = False
+
+    def fixation_frame(self):
+        return pd.DataFrame(self.fixations, columns=FIXATION_COLUMNS)
+
+    def saccade_frame(self):
+        return pd.DataFrame(self.saccades, columns=SACCADE_COLUMNS)
+
+
+class AnalysisPipeline:
+    def __init__(self, loader=None, filters=(), fixations=None, saccades=None, metrics=None, interpretation=None):
+        self.loader = loader or GazeFileLoader()
+        self.filters = list(filters)
+        self.fixations = fixations or IDTFixations()
+        self.saccades = saccades or SaccadeDetector()
+        self.metrics = metrics or ReadingMetrics()
+        self.interpretation = interpretation or ScreeningReport()
+
+    def parameters(self):
+        """Everything besides the input data that the results depend on (used as cache key)."""
+        return {
+            'engine_version': ENGINE_VERSION,
+            'filters': [f.parameters() for f in self.filters],
+            'fixations': self.fixations.parameters(),
+            'saccades': self.saccades.parameters(),
+            'metrics': self.metrics.parameters(),
+            'interpretation': self.interpretation.parameters()
+        }
+
+    def load(self, file_path):
+        samples = self.loader(file_path)
+        for sample_filter in self.filters:
+            samples = sample_filter(samples)
+        return samples
+
+    def run(self, file_path, samples=None, cache=None, progress=None):
+        """
+        Analyses a gaze file (or its already loaded samples). `progress(percent, stage)`
+        is called before each stage; it may raise to abort the analysis.
+        """
+        report = progress or (lambda percent, stage: None)
+        timings = {}
+        if samples is None:
+            report(5, "Loading gaze data")
+            started = time.perf_counter()
+            samples = self.load(file_path)
+            timings['load'] = time.perf_counter() - started
+        result = AnalysisResult(samples)
+        result.timings = timings
+        if len(samples['time']) == 0:
+            return result
+
+        if cache is not None:
+            key = cache.key(file_path, self.parameters())
+            if self._restore(result, cache.get(key)):
+                return result
+
+        def stage(name, percent, message, func, *args):
+            report(percent, message)
+            started = time.perf_counter()
+            output = func(*args)
+            result.timings[name] = time.perf_counter() - started
+            return output
+
+        result.fixations = stage('fixations', 30, "Detecting fixations", self.fixations, samples)
+        if len(result.fixations['x']):
+            result.saccades = stage('saccades', 70, "Detecting saccades", self.saccades, result.fixations)
+        if len(result.saccades['dx']):
+            result.metrics = stage('metrics', 85, "Calculating metrics", self.metrics,
+                                   result.fixations, result.saccades)
+            result.report = stage('interpretation', 95, "Interpreting results", self.interpretation,
+                                  result.metrics)
+
+        if cache is not None:
+            cache.put(key, {'fixations': result.fixation_frame(), 'saccades': result.saccade_frame()},
+                      {'metrics': result.metrics, 'report': result.report})
+        return result
+
+    @staticmethod
+    def _restore(result, cached):
+        if cached is None:
+            return False
+        tables, stored = cached
+        result.fixations = {name: tables['fixations'][name].to_numpy() for name in FIXATION_COLUMNS}
+        result.saccades = {name: tables['saccades'][name].to_numpy() for name in SACCADE_COLUMNS}
+        result.metrics = stored['metrics']
+        report = stored['report']
+        # JSON turns the report's (value, unit, description) tuples into lists
+        result.report = {name: tuple(value) if isinstance(value, list) else value
+                         for name, value in report.items()} if report else None
+        result.from_cache = True
+        return True
@@ -0,0 +1,199 @@
+# analysis_records.py
+"""
+Machine-readable analysis output, written next to the human-readable
+analysis_results.txt. Every analysis produces a structured record with the raw
+metric values, the parameters, the engine version, a digest of the input file
+and the stage timings:
+
+- analysis_results.json in the session directory (the latest analysis), and
+- one row in a SQLite index shared by all sessions, where each metric is also
+  a (analysis, name, value) row, so cohort queries run in SQL instead of
+  re-parsing every session's text. Re-analysing the same input of a session with
+  the same engine and fixation method (e.g. a cache hit) replaces its row.
+"""
+import json
+import math
+import os
+import platform
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from analysis_cache import file_digest
+from analysis_engine import ENGINE_VERSION
+
+RECORD_FILENAME = 'analysis_results.json'
+INDEX_FILENAME = 'analysis_index.sqlite'
+RECORD_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created TEXT NOT NULL,
+    user TEXT,
+    session TEXT,
+    session_dir TEXT,
+    input_digest TEXT,
+    engine_version INTEGER,
+    fixation_method TEXT,
+    n_samples INTEGER,
+    n_fixations INTEGER,
+    n_saccades INTEGER,
+    total_seconds REAL,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS analysis_metrics (
+    analysis_id INTEGER NOT NULL REFERENCES analyses(id),
+    name TEXT NOT NULL,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS analysis_metrics_name ON analysis_metrics (name, value);
+CREATE INDEX IF NOT EXISTS analysis_metrics_analysis ON analysis_metrics (analysis_id);
+CREATE INDEX IF NOT EXISTS analyses_session ON analyses (user, session);
+"""
+
+
+def session_identity(session_dir):
+    """(user, session) of a session directory laid out as <data>/<user>_data/<session>."""
+    session_dir = os.path.abspath(session_dir)
+    user_folder = os.path.basename(os.path.dirname(session_dir))
+    user = user_folder[:-5] if user_folder.endswith('_data') else user_folder
+    return user, os.path.basename(session_dir)
+
+
+def _plain(value):
+    # NumPy scalars and tuples as JSON-friendly Python values; NaN and infinities become null
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    return value
+
+
+def analysis_record(result, file_path, parameters):
+    """Builds the structured record of one AnalysisPipeline result for the gaze file it analysed."""
+    session_dir = os.path.dirname(os.path.abspath(file_path))
+    user, session = session_identity(session_dir)
+    return _plain({
+        'record_version': RECORD_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'user': user,
+        'session': session,
+        'session_dir': session_dir,
+        'input': {
+            'file': os.path.basename(file_path),
+            'bytes': os.path.getsize(file_path),
+            'digest': file_digest(file_path)
+        },
+        'software': {
+            'engine_version': ENGINE_VERSION,
+            'python': platform.python_version(),
+            'numpy': np.__version__
+        },
+        'parameters': parameters,
+        'counts': {
+            'samples': len(result.samples['time']),
+            'fixations': len(result.fixations['x']),
+            'saccades': len(result.saccades['dx'])
+        },
+        'metrics': result.metrics,
+        'report': {name: value for name, (value, unit, desc) in result.report.items()} if result.report else None,
+        'timings': result.timings,
+        'from_cache': result.from_cache
+    })
+
+
+def write_analysis_record(record, directory):
+    """Writes the record as the session's analysis_results.json (replaced atomically)."""
+    file_path = os.path.join(directory, RECORD_FILENAME)
+    tmp_path = file_path + '.tmp'
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(record, f, indent=2, allow_nan=False)
+        os.replace(tmp_path, file_path)
+        return file_path
+    except OSError as e:
+        print(f"Could not write {file_path}: {e}")
+        return None
+
+
+def _connect(index_path):
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+    connection = sqlite3.connect(index_path, timeout=30)
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def append_to_index(records, index_path):
+    """
+    Appends records (one or a list) to the SQLite index in a single transaction,
+    replacing earlier rows of the same session, input digest, engine version and method.
+    """
+    if isinstance(records, dict):
+        records = [records]
+    connection = _connect(index_path)
+    try:
+        with connection:
+            for record in records:
+                method = record['parameters'].get('fixations', {}).get('stage')
+                key = (record['user'], record['session'], record['input']['digest'],
+                       record['software']['engine_version'], method)
+                replaced = [row[0] for row in connection.execute(
+                    "SELECT id FROM analyses WHERE user IS ? AND session IS ? AND input_digest IS ? "
+                    "AND engine_version IS ? AND fixation_method IS ?", key)]
+                if replaced:
+                    marks = ', '.join('?' * len(replaced))
+                    connection.execute(f"DELETE FROM analysis_metrics WHERE analysis_id IN ({marks})", replaced)
+                    connection.execute(f"DELETE FROM analyses WHERE id IN ({marks})", replaced)
+                cursor = connection.execute(
+                    "INSERT INTO analyses (created, user, session, session_dir, input_digest, engine_version, "
+                    "fixation_method, n_samples, n_fixations, n_saccades, total_seconds, record) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (record['created'], record['user'], record['session'], record['session_dir'],
+                     record['input']['digest'], record['software']['engine_version'], method,
+                     record['counts']['samples'], record['counts']['fixations'], record['counts']['saccades'],
+                     sum(record['timings'].values()), json.dumps(record, allow_nan=False)))
+                values = dict(record['metrics'] or {})
+                values.update(record['report'] or {})
+                connection.executemany(
+                    "INSERT INTO analysis_metrics (analysis_id, name, value) VALUES (?, ?, ?)",
+                    [(cursor.lastrowid, name, None if value is None else float(value))
+                     for name, value in values.items()])
+    finally:
+        connection.close()
+
+
+def load_index(index_path, metrics=None, latest=True):
+    """
+    Returns a table with one row per analysis (only each session's latest with latest=True)
+    and one column per metric; metrics restricts the metric columns to the given names.
+    The header counts are left out, as metric names (e.g. n_fixations) would collide with them.
+    """
+    connection = _connect(index_path)
+    try:
+        latest_ids = "SELECT MAX(id) FROM analyses GROUP BY user, session"
+        analyses = pd.read_sql_query(
+            "SELECT id, created, user, session, input_digest, engine_version, fixation_method "
+            "FROM analyses" + (f" WHERE id IN ({latest_ids})" if latest else ""),
+            connection)
+        conditions, params = [], []
+        if latest:
+            conditions.append(f"analysis_id IN ({latest_ids})")
+        if metrics:
+            conditions.append(f"name IN ({', '.join('?' * len(metrics))})")
+            params = list(metrics)
+        values = pd.read_sql_query(
+            "SELECT analysis_id, name, value FROM analysis_metrics"
+            + (" WHERE " + " AND ".join(conditions) if conditions else ""), connection, params=params)
+    finally:
+        connection.close()
+    if values.empty:
+        return analyses
+    wide = values.pivot_table(index='analysis_id', columns='name', values='value', aggfunc='last', dropna=False)
+    return analyses.merge(wide, left_on='id', right_index=True, how='left')
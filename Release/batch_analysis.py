@@ -0,0 +1,146 @@
+# batch_analysis.py
+"""
+Analyses every session in the data tree (<data>/<user>_data/<session>) in parallel.
+Each session gets its analysis_results.txt, and a word_metrics.csv when it has a
+stored text layout (see word_metrics.py); a consolidated table of metrics for
+all users is written to <data>/analysis_summary.csv (or .parquet). Each analysis
+also writes its structured analysis_results.json, and the records of the run are
+appended to the SQLite results index (<data>/analysis_index.sqlite by default).
+Sessions whose calibrated data has not changed since the last run are skipped.
+
+Usage: python batch_analysis.py DATA_DIR [--jobs N] [--force] [--output PATH] [--index PATH] [--method idt|ivt|ihmm]
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+GAZE_FILENAME = 'gazeData_calibrated.txt'
+STATE_FILENAME = 'analysis_state.json'
+ANALYSIS_VERSION = 3  # Bump when the analysis changes so every session is redone
+
+
+def find_sessions(data_dir):
+    """Returns (user, session, path) for every session with calibrated data, as managed by UserPage."""
+    sessions = []
+    for user_folder in sorted(os.listdir(data_dir)):
+        user_dir = os.path.join(data_dir, user_folder)
+        if not user_folder.endswith('_data') or not os.path.isdir(user_dir):
+            continue
+        for session in sorted(os.listdir(user_dir)):
+            session_dir = os.path.join(user_dir, session)
+            if os.path.isfile(os.path.join(session_dir, GAZE_FILENAME)):
+                sessions.append((user_folder[:-5], session, session_dir))
+    return sessions
+
+
+def _input_signature(data_path, method):
+    st = os.stat(data_path)
+    return [ANALYSIS_VERSION, method, st.st_size, st.st_mtime_ns]
+
+
+def _read_state(session_dir):
+    try:
+        with open(os.path.join(session_dir, STATE_FILENAME), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def analyze_session(task):
+    """Worker: analyses one session unless its inputs are unchanged. Returns its summary row."""
+    user, session, session_dir, force, method = task
+    data_path = os.path.join(session_dir, GAZE_FILENAME)
+    try:
+        # Imported here so the parent process stays light (each worker loads them once),
+        # and inside the try so an import failure is reported as this session's failure
+        from analysis_records import analysis_record, write_analysis_record
+        from session_analysis import GazeAnalyzer, write_analysis_results
+        from text_layout import load_word_layout
+        from word_metrics import session_word_metrics, write_word_metrics
+
+        signature = _input_signature(data_path, method)
+        state = _read_state(session_dir)
+        if not force and state and state.get('signature') == signature:
+            return dict(state['row'], status='unchanged')
+
+        analyzer = GazeAnalyzer(data_path, fixation_method=method)
+        metrics = analyzer.run_analysis()
+        row = {
+            'user': user,
+            'session': session,
+            'method': method,
+            'samples': len(analyzer.raw_data),
+            'fixations': len(analyzer.fixations),
+            'saccades': len(analyzer.saccades)
+        }
+        if metrics:
+            row.update({name: float(val) for name, (val, unit, desc) in metrics.items()})
+            write_analysis_results(metrics, session_dir)
+        layout = load_word_layout(session_dir)
+        if layout is not None and analyzer.result is not None:
+            write_word_metrics(session_word_metrics(analyzer.result.fixations, layout), session_dir)
+
+        record = None
+        if analyzer.result is not None:
+            record = analysis_record(analyzer.result, data_path, analyzer.analysis_parameters())
+            write_analysis_record(record, session_dir)
+
+        with open(os.path.join(session_dir, STATE_FILENAME), 'w') as f:
+            json.dump({'signature': signature, 'row': row}, f)
+        # The record goes back to the parent, which appends the whole run to the index at once
+        return dict(row, status='analyzed' if metrics else 'insufficient data', record=record)
+    except Exception as e:
+        return {'user': user, 'session': session, 'status': f"failed: {e}"}
+
+
+def run_batch(data_dir, jobs=None, force=False, output=None, method='idt', index=None):
+    sessions = find_sessions(data_dir)
+    tasks = [(user, session, path, force, method) for user, session, path in sessions]
+    if not tasks:
+        print(f"No sessions with {GAZE_FILENAME} found under {data_dir}")
+        return pd.DataFrame()
+
+    jobs = jobs or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (jobs * 8))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        rows = list(pool.map(analyze_session, tasks, chunksize=chunksize))
+
+    records = [record for record in (row.pop('record', None) for row in rows) if record]
+    if records:
+        from analysis_records import INDEX_FILENAME, append_to_index
+        index = index or os.path.join(data_dir, INDEX_FILENAME)
+        append_to_index(records, index)
+        print(f"{len(records)} analysis records appended to: {index}")
+
+    table = pd.DataFrame(rows)
+    output = output or os.path.join(data_dir, 'analysis_summary.csv')
+    if output.endswith('.parquet'):
+        table.to_parquet(output, index=False)
+    else:
+        table.to_csv(output, index=False)
+
+    counts = table['status'].value_counts()
+    print(f"{len(table)} sessions: " + ", ".join(f"{n} {status}" for status, n in counts.items()))
+    print(f"Summary written to: {output}")
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse all users and sessions in parallel")
+    parser.add_argument('data_dir', help="directory containing the <user>_data folders")
+    parser.add_argument('--jobs', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--force', action='store_true', help="re-analyse sessions even if unchanged")
+    parser.add_argument('--output', default=None, help="summary table path (.csv or .parquet)")
+    parser.add_argument('--index', default=None, help="SQLite results index to append the analyses to")
+    parser.add_argument('--method', choices=['idt', 'ivt', 'ihmm'], default='idt', help="fixation detector")
+    args = parser.parse_args(argv)
+    table = run_batch(args.data_dir, args.jobs, args.force, args.output, args.method, args.index)
+    return 1 if table.empty or table['status'].str.startswith('failed').any() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
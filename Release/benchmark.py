@@ -0,0 +1,302 @@
+# benchmark.py
+"""
+Throughput benchmarks for the analysis pipeline.
+The end-to-end suite times every stage from loading a synthetic reading recording
+to rendering its results, at each of --sizes samples. The startup suite profiles
+the imports of main.py with -X importtime and fails if a deferred module loads.
+
+Run: python benchmark.py [parsing] [pipeline] [detectors] [end-to-end] [startup]
+                         [--samples N] [--sizes N,N,...] [--gaze-file PATH ...]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+import gaze_io
+from synthetic_gaze import synthetic_reading_samples, synthetic_layout, write_recording
+from analysis_engine import (AnalysisPipeline, ReadingMetrics, SaccadeDetector, ScreeningReport,
+                             FIXATION_STAGES, fixation_stage)
+
+
+def write_gaze_file(file_path, times, xs, ys):
+    """Writes samples (times in seconds from the start) as gaze lines in the recorder's text format."""
+    start = (datetime(2026, 1, 1, 20, 13, 49) - gaze_io.EPOCH).total_seconds()
+    with open(file_path, 'w') as f:
+        gaze_io.write_gaze_text(f, start + np.asarray(times), xs, ys)
+
+
+def write_sample_file(file_path, n_samples, rate_hz=90, seed=0):
+    """Writes n_samples of random gaze lines in the recorder's text format."""
+    rng = np.random.default_rng(seed)
+    write_gaze_file(file_path, np.arange(n_samples) / rate_hz,
+                    rng.uniform(-1, 1, n_samples), rng.uniform(-1, 1, n_samples))
+
+
+def legacy_load(file_path):
+    """The per-line regex + strptime loader the analyzers used before gaze_io."""
+    data = []
+    pattern = re.compile(r'\[(.*?)\] Gaze point: \[(.*?), (.*?)\]')
+    with open(file_path, 'r') as f:
+        for line in f:
+            match = pattern.search(line)
+            if match:
+                ts_str, x_str, y_str = match.groups()
+                ts = datetime.strptime(ts_str, "%Y-%m-%d %H:%M:%S.%f").timestamp()
+                data.append({'time': ts, 'x': float(x_str), 'y': float(y_str)})
+    return data
+
+
+def _time_call(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_parsing(n_samples):
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, 'gazeData.txt')
+        write_sample_file(file_path, n_samples)
+        gaze_io.load_gaze_arrays(file_path)  # build the sidecar once
+
+        def sidecar_load(path):
+            times, xs, ys = gaze_io.read_sidecar(path)
+            return np.asarray(times).sum() + np.asarray(xs).sum() + np.asarray(ys).sum()
+
+        results = [
+            ("legacy regex + strptime", _time_call(legacy_load, file_path)),
+            ("gaze_io.parse_gaze_text", _time_call(gaze_io.parse_gaze_text, file_path)),
+            ("gaze_io sidecar (memmap)", _time_call(sidecar_load, file_path)),
+        ]
+
+    print(f"Parsing {n_samples} lines")
+    for name, seconds in results:
+        print(f"  {name:<28} {seconds:8.4f} s  {n_samples / seconds:14,.0f} lines/s")
+
+
+def bench_pipeline(n_samples):
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, 'gazeData.txt')
+        write_gaze_file(file_path, *synthetic_reading_samples(n_samples)[:3])
+        gaze_io.load_gaze_arrays(file_path)  # build the sidecar once
+        result = AnalysisPipeline().run(file_path)
+
+    print(f"Analysis pipeline on {n_samples} samples ({len(result.fixations['x'])} fixations)")
+    for stage, seconds in result.timings.items():
+        print(f"  {stage:<28} {seconds:8.4f} s")
+
+
+def fixation_labels(fixations, n_samples):
+    """Per-sample boolean: does the sample belong to one of the fixations (a fixation table)?"""
+    labels = np.zeros(n_samples, dtype=bool)
+    for start, stop in zip(fixations['start_idx'], fixations['stop_idx']):
+        labels[start:stop] = True
+    return labels
+
+
+def compare_detectors(times, xs, ys, truth=None, repeat=3):
+    """Times every fixation method on the same samples; agreement is the share of equally labelled samples."""
+    rows = []
+    reference = None
+    samples = {'time': np.asarray(times, dtype=float), 'x': np.asarray(xs, dtype=float),
+               'y': np.asarray(ys, dtype=float)}
+    for method in FIXATION_STAGES:
+        detector = fixation_stage(method)
+        fixations = detector(samples)
+        seconds = _time_call(detector, samples, repeat=repeat)
+        labels = fixation_labels(fixations, len(times))
+        if reference is None:
+            reference = labels  # I-DT, the analyses' default
+        row = {'method': method, 'seconds': seconds, 'fixations': len(fixations['x']),
+               'vs_idt': (labels == reference).mean()}
+        if truth is not None:
+            row['vs_truth'] = (labels == truth).mean()
+        rows.append(row)
+    return rows
+
+
+def _print_detector_rows(rows):
+    for row in rows:
+        truth = f"  truth {row['vs_truth']:6.1%}" if 'vs_truth' in row else ""
+        print(f"  {row['method']:<6} {row['seconds']:8.4f} s  {row['fixations']:6d} fixations"
+              f"  agreement: I-DT {row['vs_idt']:6.1%}{truth}")
+
+
+def bench_detectors(n_samples, gaze_files=()):
+    times, xs, ys, truth = synthetic_reading_samples(n_samples)
+    print(f"Fixation detectors on {n_samples} synthetic reading samples ({np.sum(np.diff(truth.astype(int)) == 1)} true fixations)")
+    _print_detector_rows(compare_detectors(times, xs, ys, truth))
+
+    for file_path in gaze_files:
+        times, xs, ys = gaze_io.load_gaze_arrays(file_path)
+        times = np.asarray(times) - times[0]
+        print(f"Fixation detectors on {file_path} ({len(times)} samples)")
+        _print_detector_rows(compare_detectors(times, np.asarray(xs), np.asarray(ys)))
+
+
+def _render_results(fixations, saccades, times, xs):
+    # The results window's graphs, drawn off-screen
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from plotting import add_scanpath, plot_decimated
+
+    figure = Figure(figsize=(14, 10))
+    canvas = FigureCanvasAgg(figure)
+    ax1 = figure.add_subplot(211)
+    ax1.scatter(fixations['x'], fixations['y'], s=fixations['duration'] * 800, alpha=0.4, c='blue')
+    add_scanpath(ax1, fixations['x'], fixations['y'], saccades['type'],
+                 {'regression': dict(color='red', alpha=0.5, linewidth=1)},
+                 default=dict(color='green', alpha=0.15, linewidth=1))
+    ax2 = figure.add_subplot(212)
+    plot_decimated(ax2, times, xs, color='gray', alpha=0.3)
+    ax2.plot(fixations['end_time'], fixations['x'], 'o-', color='navy', markersize=3, linewidth=1)
+    canvas.draw()
+
+
+def _render_heatmap(points, width, height):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication, QWidget
+    from overlays import HeatmapOverlay
+
+    app = QApplication.instance() or QApplication([])
+    parent = QWidget()
+    parent.resize(width, height)
+    overlay = HeatmapOverlay(points, {}, parent)
+    overlay.resize(width, height)
+    overlay._render_cache()
+    return app
+
+
+def bench_end_to_end(sizes, rate_hz=90):
+    """Times each stage from the recorded text file to the rendered results, for every size."""
+    from calibration_model import PolynomialCalibration, calibrate_gaze_file
+    from screen_coords import normalize_gaze_array
+    from word_hits import compute_word_hits
+    from word_index import WordIndex
+
+    layout = synthetic_layout()
+    width, height = layout['screen_width'], layout['screen_height']
+    word_index = WordIndex(layout['boxes'], layout['identifiers'])
+    # A mildly distorted tracker and the degree-2 model that undoes it
+    dots = np.array([(x, y) for x in (-0.6, 0.0, 0.6) for y in (-0.5, 0.0, 0.5)])
+    measured = dots * 1.04 + np.array([0.02, -0.03]) + 0.01 * dots ** 2
+    model = PolynomialCalibration.fit(measured, dots)
+
+    stage_names = ['write recording', 'parse text', 'sidecar load', 'calibration', 'fixations (I-DT)',
+                   'fixations (I-VT)', 'saccades', 'metrics', 'hit counting', 'render graphs', 'render heatmap']
+    table = {name: [] for name in stage_names}
+    for n_samples in sizes:
+        repeat = 3 if n_samples <= 100_000 else 1
+        with tempfile.TemporaryDirectory() as tmp:
+            raw_path = os.path.join(tmp, 'gazeData.txt')
+            calibrated_path = os.path.join(tmp, 'gazeData_calibrated.txt')
+            timings = {}
+
+            start = time.perf_counter()
+            write_recording(raw_path, layout, n_samples, rate_hz)
+            timings['write recording'] = time.perf_counter() - start
+            timings['parse text'] = _time_call(gaze_io.parse_gaze_text, raw_path, repeat=repeat)
+            times, xs, ys = gaze_io.load_gaze_arrays(raw_path)  # builds the sidecar
+            timings['sidecar load'] = _time_call(
+                lambda path: [np.asarray(column).sum() for column in gaze_io.read_sidecar(path)], raw_path, repeat=repeat)
+            timings['calibration'] = _time_call(calibrate_gaze_file, model.transform, raw_path, calibrated_path,
+                                                repeat=repeat)
+
+            times, xs, ys = (np.asarray(column) for column in gaze_io.load_gaze_arrays(calibrated_path))
+            times = times - times[0]
+            samples = {'time': times, 'x': xs, 'y': ys}
+            timings['fixations (I-DT)'] = _time_call(fixation_stage('idt'), samples, repeat=repeat)
+            timings['fixations (I-VT)'] = _time_call(fixation_stage('ivt'), samples, repeat=repeat)
+            fixations = fixation_stage('idt')(samples)
+            timings['saccades'] = _time_call(SaccadeDetector(), fixations, repeat=repeat)
+            saccades = SaccadeDetector()(fixations)
+            timings['metrics'] = _time_call(lambda f, s: ScreeningReport()(ReadingMetrics()(f, s)),
+                                            fixations, saccades, repeat=repeat)
+            timings['hit counting'] = _time_call(compute_word_hits, times, xs, ys, word_index, width, height,
+                                                 repeat=repeat)
+            timings['render graphs'] = _time_call(_render_results, fixations, saccades, times, xs, repeat=1)
+            points = np.column_stack(normalize_gaze_array(xs, ys, width, height))
+            timings['render heatmap'] = _time_call(_render_heatmap, points, width, height, repeat=1)
+        for name in stage_names:
+            table[name].append(timings[name])
+        print(f"  ... {n_samples:,} samples done ({len(fixations['x']):,} fixations)")
+
+    print(f"End-to-end stages (seconds) at {rate_hz:g} Hz")
+    print(f"  {'stage':<20}" + "".join(f"{n:>14,}" for n in sizes))
+    for name in stage_names:
+        print(f"  {name:<20}" + "".join(f"{seconds:14.4f}" for seconds in table[name]))
+    return table
+
+
+# Modules that must not load before the main window shows
+STARTUP_DEFERRED = ('pandas', 'matplotlib', 'sklearn', 'joblib', 'analysis_engine', 'results_window',
+                    'calibration', 'live_analysis', 'gaze_transport')
+_IMPORTTIME_LINE = re.compile(r'^import time:\s*(\d+) \|\s*(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(report):
+    """Parses -X importtime output into (module, self seconds, cumulative seconds, depth) rows."""
+    rows = []
+    for line in report.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us) / 1e6, int(cumulative_us) / 1e6, (len(indent) - 1) // 2))
+    return rows
+
+
+def bench_startup(module='main', top=10):
+    """Profiles the imports of a fresh interpreter loading module. Returns the deferred modules it loaded."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=here, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+        return [module]
+    rows = parse_importtime(result.stderr)
+    total = sum(self_seconds for _, self_seconds, _, _ in rows)
+    loaded = {name.split('.')[0] for name, _, _, _ in rows}
+    offenders = sorted(loaded.intersection(STARTUP_DEFERRED))
+
+    print(f"Import profile of '{module}': {len(rows)} modules, {total * 1000:.1f} ms")
+    for name, _, cumulative, _ in sorted((r for r in rows if r[3] == 0), key=lambda r: -r[2])[:top]:
+        print(f"  {name:<40}{cumulative * 1000:10.1f} ms")
+    if offenders:
+        print(f"  Startup regression: {', '.join(offenders)} imported before the window shows")
+    return offenders
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gaze analysis benchmarks")
+    suites = ['parsing', 'pipeline', 'detectors', 'end-to-end', 'startup']
+    parser.add_argument('suites', nargs='*', default=suites, choices=suites, help="benchmarks to run (default: all)")
+    parser.add_argument('--samples', type=int, default=100_000, help="number of gaze samples")
+    parser.add_argument('--sizes', default='1000,100000,10000000',
+                        help="comma-separated sample counts for the end-to-end suite")
+    parser.add_argument('--gaze-file', action='append', default=[],
+                        help="recorded gaze file to compare the fixation detectors on (repeatable)")
+    args = parser.parse_args()
+    if 'parsing' in args.suites:
+        bench_parsing(args.samples)
+    if 'pipeline' in args.suites:
+        bench_pipeline(args.samples)
+    if 'detectors' in args.suites:
+        bench_detectors(args.samples, args.gaze_file)
+    if 'end-to-end' in args.suites:
+        bench_end_to_end([int(n) for n in args.sizes.split(',')])
+    if 'startup' in args.suites and bench_startup():
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
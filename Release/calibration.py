@@ -1,17 +1,15 @@
+import json
 import os
 from PyQt5.QtWidgets import QWidget, QPushButton, QHBoxLayout
 from PyQt5.QtGui import QPainter, QColor, QPen
 from PyQt5.QtCore import QPoint, Qt
 
 import numpy as np
-import sklearn
-import joblib
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.linear_model import LinearRegression
-from sklearn.pipeline import make_pipeline
 
 from ui_styles import get_button_style, get_exit_button_style
 from config import app_config
+from gaze_io import load_gaze_arrays
+from calibration_model import PolynomialCalibration, calibrate_gaze_file, load_calibration_model, MODEL_FILENAME
 
 class CalibrationScreen(QWidget):
     
@@ -130,6 +128,7 @@ class CalibrationScreen(QWidget):
         print("Debug: Results path -", results_path)
         measured_points = []
         expected_points = []
+        dot_rows = []  # Same values as calibration_results.txt, for calibration_results.json
         try:
             with open(results_path, 'w') as result_file:
                 result_file.write("Calibration Results:\n")
@@ -145,9 +144,15 @@ class CalibrationScreen(QWidget):
                             expected_points.append(expected)
                             distance = self.calculate_distance(average_gaze_point, expected)
                             result_file.write(f"{index}, {expected}, {average_gaze_point}, {distance:.2f}\n")
+                            dot_rows.append({'index': index, 'expected': list(expected),
+                                             'measured': [float(v) for v in average_gaze_point],
+                                             'distance': float(distance)})
                     else:
                         print(f"File not found: {file_path}")
 
+            with open(os.path.join(directory, 'calibration_results.json'), 'w') as f:
+                json.dump({'dots': dot_rows, 'n_dots': len(self.dots)}, f, indent=2)
+
             if measured_points and expected_points:
                 self.fit_polynomial_regression(np.array(measured_points), np.array(expected_points))
                 original_file = os.path.join(directory, 'gazeData.txt')
@@ -157,26 +162,18 @@ class CalibrationScreen(QWidget):
             print(f"Error during calibration data analysis: {e}")
 
     def fit_polynomial_regression(self, measured_points, expected_points, degree=2):
-        model = make_pipeline(PolynomialFeatures(degree), LinearRegression())
-        model.fit(measured_points, expected_points)
+        model = PolynomialCalibration.fit(measured_points, expected_points, degree)
         directory = app_config.session_directory
         if not directory:
             print("No session directory set for saving the polynomial regression model.")
             return
-        model_path = os.path.join(directory, 'polynomial_regression_model.pkl')  # Ensure model is saved in the session directory
-        joblib.dump(model, model_path)  # Save the model to disk
+        model_path = os.path.join(directory, MODEL_FILENAME)  # Ensure model is saved in the session directory
+        model.save(model_path)  # Save the coefficient matrix to disk
         print(f"Polynomial regression model saved at: {model_path}")
 
     def read_gaze_data(self, file_path):
-        gaze_points = []
-        with open(file_path, 'r') as file:
-            for line in file:
-                if 'Gaze point:' in line:
-                    _, coords = line.split('Gaze point:')
-                    x, y = map(float, coords.strip(' []\n').split(','))
-                    # Directly append the x and y values as they are read
-                    gaze_points.append((x, y))
-        return gaze_points
+        _, xs, ys = load_gaze_arrays(file_path)
+        return list(zip(xs.tolist(), ys.tolist()))
 
     def calculate_average_gaze_point(self, gaze_points, expected):
         # Filter gaze points based on the threshold before averaging
@@ -195,15 +192,9 @@ class CalibrationScreen(QWidget):
         return ((measured[0] - expected[0])**2 + (measured[1] - expected[1])**2)**0.5
 
     def preprocess_gaze_data(self, original_file, transformed_file):
-        model_path = os.path.join(self.session_directory, 'polynomial_regression_model.pkl')
-        if os.path.exists(model_path):
-            model = joblib.load(model_path)  # Load the model from the user-specific directory
-            with open(original_file, 'r') as infile, open(transformed_file, 'w') as outfile:
-                for line in infile:
-                    if 'Gaze point:' in line:
-                        timestamp_part, gaze_part = line.split('Gaze point:')
-                        x, y = map(float, gaze_part.strip(' []\n').split(','))
-                        transformed = model.predict([[x, y]])[0]
-                        outfile.write(f"{timestamp_part}Gaze point: [{transformed[0]}, {transformed[1]}]\n")
+        model = load_calibration_model(self.session_directory)  # Also reads older .pkl models
+        if model is not None:
+            count, rejected = calibrate_gaze_file(model.transform, original_file, transformed_file)
+            print(f"Calibrated {count} gaze points ({rejected} malformed lines skipped)")
         else:
-            print(f"Model file not found at {model_path}")
+            print(f"Model file not found in {self.session_directory}")
@@ -0,0 +1,149 @@
+# calibration_model.py
+import json
+import os
+import re
+
+import numpy as np
+
+MODEL_FILENAME = 'calibration_model.json'
+LEGACY_MODEL_FILENAME = 'polynomial_regression_model.pkl'
+
+
+def polynomial_powers(degree):
+    """Exponent pairs (a, b) for x**a * y**b, in the same order as sklearn's PolynomialFeatures."""
+    return [(total - b, b) for total in range(degree + 1) for b in range(total + 1)]
+
+
+class PolynomialCalibration:
+    """
+    2D polynomial mapping from raw to calibrated gaze coordinates, stored as an
+    explicit coefficient matrix: output = sum_k coefficients[k] * x**a_k * y**b_k.
+    """
+    def __init__(self, powers, coefficients):
+        self.powers = [tuple(int(p) for p in pair) for pair in powers]
+        self.coefficients = np.asarray(coefficients, dtype=np.float64).reshape(len(self.powers), 2)
+        # Plain Python floats for the single-point path used in live loops
+        self._terms = [(a, b, float(cx), float(cy))
+                       for (a, b), (cx, cy) in zip(self.powers, self.coefficients)]
+
+    @property
+    def degree(self):
+        return max(a + b for a, b in self.powers)
+
+    @classmethod
+    def fit(cls, measured_points, expected_points, degree=2):
+        """Least-squares fit of the polynomial that maps measured points onto expected ones."""
+        measured = np.asarray(measured_points, dtype=np.float64)
+        expected = np.asarray(expected_points, dtype=np.float64)
+        powers = polynomial_powers(degree)
+        design = np.column_stack([measured[:, 0] ** a * measured[:, 1] ** b for a, b in powers])
+        coefficients, *_ = np.linalg.lstsq(design, expected, rcond=None)
+        return cls(powers, coefficients)
+
+    @classmethod
+    def from_sklearn(cls, pipeline):
+        """Converts a fitted PolynomialFeatures + LinearRegression pipeline."""
+        features, regression = pipeline.steps[0][1], pipeline.steps[-1][1]
+        powers = [tuple(row) for row in features.powers_]
+        coefficients = np.array(regression.coef_, dtype=np.float64).T.copy()
+        constant = powers.index((0, 0))
+        coefficients[constant] += regression.intercept_
+        return cls(powers, coefficients)
+
+    def transform(self, points):
+        """Maps an (n, 2) array of raw points to calibrated points."""
+        points = np.asarray(points, dtype=np.float64)
+        x, y = points[:, 0], points[:, 1]
+        out = np.zeros((len(points), 2))
+        for (a, b), (cx, cy) in zip(self.powers, self.coefficients):
+            term = x ** a * y ** b if (a or b) else 1.0
+            out[:, 0] += cx * term
+            out[:, 1] += cy * term
+        return out
+
+    def transform_point(self, x, y):
+        """Maps a single raw point; avoids any array allocation."""
+        tx = ty = 0.0
+        for a, b, cx, cy in self._terms:
+            term = x ** a * y ** b
+            tx += cx * term
+            ty += cy * term
+        return tx, ty
+
+    def save(self, file_path):
+        with open(file_path, 'w') as f:
+            json.dump({
+                'type': 'polynomial',
+                'powers': [list(p) for p in self.powers],
+                'coefficients': self.coefficients.tolist()
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+        return cls(data['powers'], data['coefficients'])
+
+
+def load_calibration_model(directory):
+    """
+    Loads the session's calibration model. Falls back to the older joblib-pickled
+    sklearn pipeline, which is converted and saved in the coefficient format so
+    later loads skip sklearn. Returns None if the session has no model.
+    """
+    model_path = os.path.join(directory, MODEL_FILENAME)
+    if os.path.exists(model_path):
+        return PolynomialCalibration.load(model_path)
+
+    legacy_path = os.path.join(directory, LEGACY_MODEL_FILENAME)
+    if os.path.exists(legacy_path):
+        import joblib  # only needed for sessions calibrated by older versions
+        model = PolynomialCalibration.from_sklearn(joblib.load(legacy_path))
+        try:
+            model.save(model_path)
+        except OSError as e:
+            print(f"Could not save converted calibration model: {e}")
+        return model
+    return None
+
+
+# Matches the part of a gaze line before 'Gaze point:' verbatim, then the two coordinates
+_CALIBRATION_LINE = re.compile(
+    r'^(.*?)Gaze point:\s*\[\s*([^,\]\s]+)\s*,\s*([^,\]\s]+)\s*\][ \t]*$', re.MULTILINE)
+
+
+def calibrate_gaze_file(predict, original_file, transformed_file, chunk_bytes=64 * 1024 * 1024):
+    """
+    Applies a calibration mapping to every gaze point of a recording.
+    `predict` maps an (n, 2) array of raw points to calibrated points in one call.
+    The file is processed in chunks of about `chunk_bytes`, each written with one
+    bulk write; the text before 'Gaze point:' is copied unchanged.
+    Returns (calibrated point count, skipped line count).
+    """
+    count = rejected = 0
+    with open(original_file, 'r') as infile, open(transformed_file, 'w') as outfile:
+        while True:
+            lines = infile.readlines(chunk_bytes)
+            if not lines:
+                break
+            gaze_lines = [line for line in lines if 'Gaze point:' in line]
+            matches = _CALIBRATION_LINE.findall(''.join(gaze_lines))
+            prefixes, xs, ys = [], [], []
+            for prefix, x_str, y_str in matches:
+                try:
+                    x, y = float(x_str), float(y_str)
+                except ValueError:
+                    continue
+                prefixes.append(prefix)
+                xs.append(x)
+                ys.append(y)
+            rejected += len(gaze_lines) - len(prefixes)
+            if not prefixes:
+                continue
+
+            transformed = np.asarray(predict(np.column_stack([xs, ys])), dtype=float)
+            outfile.write(''.join(
+                f"{prefix}Gaze point: [{tx}, {ty}]\n"
+                for prefix, tx, ty in zip(prefixes, transformed[:, 0].tolist(), transformed[:, 1].tolist())))
+            count += len(prefixes)
+    return count, rejected
@@ -1,7 +1,15 @@
 # config.py
+import os
+
 class AppConfig:
     def __init__(self):
         self._session_directory = None
+        self._cache_directory = os.path.join(os.path.expanduser('~'), '.gazelexia', 'analysis_cache')
+        self._results_index = os.path.join(os.path.expanduser('~'), '.gazelexia', 'analysis_index.sqlite')
+        # Recorder invoked as <command...> <window id> <gaze file>; fake_recorder.py is a drop-in stand-in
+        self._recorder_command = ["/Users/borana/Documents/GitHub/DyslexiaProject/Release/cpp_exec/Tobii_api_test1"]
+        self._gaze_transport = 'file'  # 'file', or 'socket' for the binary gaze_transport stream
+        self._prewarm_imports = True  # Import the calibration/results modules in the background after startup
 
     @property
     def session_directory(self):
@@ -11,6 +19,48 @@ class AppConfig:
     def session_directory(self, value):
         self._session_directory = value
 
+    @property
+    def cache_directory(self):
+        return self._cache_directory
+
+    @cache_directory.setter
+    def cache_directory(self, value):
+        self._cache_directory = value
+
+    @property
+    def results_index(self):
+        return self._results_index
+
+    @results_index.setter
+    def results_index(self, value):
+        self._results_index = value
+
+    @property
+    def recorder_command(self):
+        return self._recorder_command
+
+    @recorder_command.setter
+    def recorder_command(self, value):
+        self._recorder_command = list(value)
+
+    @property
+    def gaze_transport(self):
+        return self._gaze_transport
+
+    @gaze_transport.setter
+    def gaze_transport(self, value):
+        if value not in ('file', 'socket'):
+            raise ValueError(f"Unknown gaze transport '{value}'")
+        self._gaze_transport = value
+
+    @property
+    def prewarm_imports(self):
+        return self._prewarm_imports
+
+    @prewarm_imports.setter
+    def prewarm_imports(self, value):
+        self._prewarm_imports = bool(value)
+
 # Singleton instance
 app_config = AppConfig()
 
@@ -1,73 +1,122 @@
-import sys, time, os
+import sys, time, os, threading
 from datetime import datetime
 from PyQt5.QtCore import QThread, pyqtSignal
 import numpy as np
-import matplotlib.pyplot as plt
-
-def normalize_gaze_to_screen(gaze_point, screen_width, screen_height):
-    x, y = gaze_point
-    x_scale = max(abs(x), 1)
-    y_scale = max(abs(y), 1)
-    screen_x = int(((x / x_scale) + 1) / 2 * screen_width)
-    screen_y = int((1 - (y / y_scale)) / 2 * screen_height)
-    return screen_x, screen_y
-
-def parse_word_hit_counts(file_path):
-    word_hit_data = []
-    with open(file_path, 'r') as file:
-        for line in file:
-            parts = line.strip().split(' - ')
-            identifier, count_str = parts[0], parts[1]
-            timestamps_str = parts[3] if len(parts) > 3 else ""
-            coords = tuple(map(float, identifier.split('-')))
-            count = int(count_str.split(': ')[1])
-            timestamps = timestamps_str.split(', ')
-            word_hit_data.append({'coords': coords, 'count': count, 'timestamps': timestamps})
-    return word_hit_data
+
+from gaze_io import to_datetime
+# Qt-free helpers, re-exported for the GUI modules
+from screen_coords import normalize_gaze_to_screen, normalize_gaze_array
+from word_hits import parse_word_hit_counts, session_word_hits, write_hit_counts_file
+
+class PlaybackClock:
+    """
+    Maps the monotonic clock onto a position in the recording (seconds from its
+    first sample), with adjustable speed and seeking.
+    """
+    MIN_SPEED, MAX_SPEED = 0.25, 16.0
+
+    def __init__(self, duration, speed=1.0, clock=time.monotonic):
+        self.duration = duration
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._speed = self._clamp_speed(speed)
+        self._base_position = 0.0
+        self._base_time = clock()
+
+    def _clamp_speed(self, speed):
+        return min(max(float(speed), self.MIN_SPEED), self.MAX_SPEED)
+
+    def position(self):
+        with self._lock:
+            return self._base_position + (self._clock() - self._base_time) * self._speed
+
+    @property
+    def speed(self):
+        return self._speed
+
+    def set_speed(self, speed):
+        with self._lock:
+            now = self._clock()
+            self._base_position += (now - self._base_time) * self._speed
+            self._base_time = now
+            self._speed = self._clamp_speed(speed)
+
+    def seek(self, position):
+        with self._lock:
+            self._base_position = min(max(float(position), 0.0), self.duration)
+            self._base_time = self._clock()
 
 class GazeDataProcessor(QThread):
+    """
+    Plays a recording back against its own timestamps. Samples are processed in
+    batches once per display frame, and at most one gaze update is emitted per frame.
+    """
     update_gaze_signal = pyqtSignal(datetime, int, int)
+    samples_played = pyqtSignal(object)  # (n, 2) screen points first played this frame, e.g. for a live heatmap
 
-    def __init__(self, gaze_data, screen_width, screen_height, word_labels, user_directory=None):
+    def __init__(self, gaze_data, screen_width, screen_height, word_index, user_directory=None,
+                 speed=1.0, refresh_rate=60.0):
         super().__init__()
         self.gaze_data = gaze_data
         self.screen_width = screen_width
         self.screen_height = screen_height
-        self.word_labels = word_labels
         self.user_directory = user_directory
-        self.word_hits = {label[0]: {'count': 0, 'timestamps': [], 'coords': None} for label in word_labels}
-        self.label_geometries = self._compute_label_geometries()
+        self.word_index = word_index  # WordIndex over the displayed words, e.g. TextCanvas.word_index()
+        self.word_hits = {identifier: {'count': 0, 'timestamps': [], 'coords': None}
+                          for identifier in word_index.identifiers}
+        self.frame_interval = 1.0 / (refresh_rate if refresh_rate > 0 else 60.0)
+        times = np.asarray(gaze_data[0], dtype=float)
+        self.offsets = times - times[0] if len(times) else times
+        self.clock = PlaybackClock(float(self.offsets[-1]) if len(times) else 0.0, speed)
+        self._seeked = False
+
+    def set_speed(self, speed):
+        self.clock.set_speed(speed)
 
-    def _compute_label_geometries(self):
-        geometries = {}
-        for identifier, label_obj, word in self.word_labels:
-            geometries[identifier] = label_obj.geometry()
-        return geometries
+    def seek(self, position):
+        """Jumps to `position` seconds into the recording."""
+        self.clock.seek(position)
+        self._seeked = True
 
     def run(self):
-        for line in self.gaze_data:
-            timestamp_str, gaze_str = line.split('] Gaze point: ')
-            timestamp = datetime.strptime(timestamp_str[1:], "%Y-%m-%d %H:%M:%S.%f")
-            gaze_point = [float(val) for val in gaze_str.strip()[1:-1].split(',')]
-            screen_x, screen_y = normalize_gaze_to_screen(gaze_point, self.screen_width, self.screen_height)
-
-            for identifier, geometry in self.label_geometries.items():
-                if geometry.contains(screen_x, screen_y):
-                    if self.word_hits[identifier]['coords'] is None:
-                        self.word_hits[identifier]['coords'] = (geometry.x(), geometry.y())
-                    self.word_hits[identifier]['count'] += 1
-                    self.word_hits[identifier]['timestamps'].append(timestamp.strftime("%Y-%m-%d %H:%M:%S.%f"))
-
-            self.update_gaze_signal.emit(timestamp, screen_x, screen_y)
-            time.sleep(0.02)
+        times, xs, ys = self.gaze_data
+        # Hit counts cover the whole recording, so seeking during playback cannot skew them
+        self.word_hits = session_word_hits(times, xs, ys, self.word_index, self.screen_width, self.screen_height)[0]
+        screen_xs, screen_ys = normalize_gaze_array(xs, ys, self.screen_width, self.screen_height)
+        points = np.column_stack((screen_xs, screen_ys))
+        played = np.zeros(len(points), dtype=bool)  # Replays after a backward seek are not sent again
+        times, screen_xs, screen_ys = times.tolist(), screen_xs.tolist(), screen_ys.tolist()
+        cursor = 0
+        if not self._seeked:
+            self.clock.seek(0.0)  # Start from the beginning unless a seek is already pending
+        next_frame = time.monotonic()
+
+        while cursor < len(times) and not self.isInterruptionRequested():
+            position = self.clock.position()
+            if self._seeked:
+                self._seeked = False
+                cursor = int(np.searchsorted(self.offsets, position, side='left'))
+            end = int(np.searchsorted(self.offsets, position, side='right'))
+
+            # Only the latest sample due by now is drawn
+            if end > cursor:
+                new = np.flatnonzero(~played[cursor:end]) + cursor
+                if len(new):
+                    played[new] = True
+                    self.samples_played.emit(points[new])
+                self.update_gaze_signal.emit(to_datetime(times[end - 1]), screen_xs[end - 1], screen_ys[end - 1])
+                cursor = end
+
+            next_frame += self.frame_interval
+            delay = next_frame - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_frame = time.monotonic()  # Fell behind; do not try to catch up with a burst
 
     def write_hit_counts_to_file(self, filename='word_hit_counts.txt'):
         if not self.user_directory:
             print("User directory not set. Cannot write hit counts.")
             return
         file_path = os.path.join(self.user_directory, filename)
-        with open(file_path, 'w') as file:
-            for key, data in self.word_hits.items():
-                coords_str = f" - Coords: {data['coords'][0]}, {data['coords'][1]}" if data['coords'] else ""
-                timestamps_str = ', '.join(data['timestamps'])
-                file.write(f"{key}: {data['count']}{coords_str} - Timestamps: {timestamps_str}\n")
+        write_hit_counts_file(file_path, self.word_hits)
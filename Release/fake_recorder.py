@@ -0,0 +1,67 @@
+# fake_recorder.py
+"""
+Stand-in for the Tobii recorder (cpp_exec/Tobii_api_test1) that emits synthetic
+reading gaze in real time, for testing without an eye tracker. It takes the same
+arguments, so it can replace the executable in the recording command. It appends
+'[timestamp] Gaze point: [x, y]' lines to the output file, or, with --socket,
+sends binary records (gaze_protocol.py) to the app's gaze_transport reader.
+
+Usage: python fake_recorder.py WINDOW_ID OUTPUT_FILE [--socket ADDRESS] [--rate HZ] [--duration S]
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from gaze_io import EPOCH, format_gaze_lines
+from gaze_protocol import connect, encode_records
+from synthetic_gaze import synthetic_reading_samples
+
+
+def run(output_file, address=None, rate_hz=90.0, duration=600.0, batch_interval=0.01, seed=0):
+    """Emits rate_hz samples per second for duration seconds (or until interrupted); returns the count sent."""
+    _, xs, ys, _ = synthetic_reading_samples(int(rate_hz * duration), rate_hz, seed=seed)
+    sock = connect(address) if address else None
+    out = None if sock else open(output_file, 'a')
+    start_clock = time.monotonic()
+    start_time = (datetime.now() - EPOCH).total_seconds()
+    sent = 0
+    try:
+        while sent < len(xs):
+            due = min(int((time.monotonic() - start_clock) * rate_hz) + 1, len(xs))
+            if due > sent:
+                times = start_time + np.arange(sent, due) / rate_hz
+                if sock:
+                    sock.sendall(encode_records(times, xs[sent:due], ys[sent:due]))  # Blocks under backpressure
+                else:
+                    out.write(format_gaze_lines(times, xs[sent:due], ys[sent:due]))
+                    out.flush()
+                sent = due
+            time.sleep(batch_interval)
+    except (KeyboardInterrupt, BrokenPipeError, ConnectionResetError):
+        pass
+    finally:
+        if sock:
+            sock.close()
+        if out:
+            out.close()
+    return sent
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetic gaze recorder for testing")
+    parser.add_argument('window_id', help="ignored; accepted for compatibility with the Tobii recorder")
+    parser.add_argument('output_file', help="gaze text file to append to (unused with --socket)")
+    parser.add_argument('--socket', default=None, help="gaze_transport address to send binary records to")
+    parser.add_argument('--rate', type=float, default=90.0, help="samples per second")
+    parser.add_argument('--duration', type=float, default=600.0, help="seconds of gaze to emit")
+    args = parser.parse_args(argv)
+    sent = run(args.output_file, args.socket, args.rate, args.duration)
+    print(f"Sent {sent} samples")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+# fixations.py
+from collections import deque
+
+import numpy as np
+
+
+class StreamingIDT:
+    """
+    I-DT (Dispersion-Threshold) fixation detector that runs in linear time.
+    The bounding box of the current window is tracked with monotonic deques
+    instead of being recomputed for every candidate end point, and samples can
+    be pushed in chunks; each call returns the fixations that closed in it.
+    With include_break_sample the duration and centroid also cover the sample
+    that broke the dispersion window (the screening analysis' definition).
+    """
+    def __init__(self, dispersion=0.05, duration_min=0.1, include_break_sample=False):
+        self.dispersion = dispersion
+        self.duration_min = duration_min
+        self.include_break_sample = include_break_sample
+        self.reset()
+
+    def reset(self):
+        # Buffered samples start at global index self._offset
+        self._t, self._x, self._y = [], [], []
+        self._offset = 0
+        self._i = 0        # window start (global index)
+        self._j = 1        # next candidate end point (global index)
+        self._added = -1   # last index pushed into the extrema deques
+        self._max_x, self._min_x = deque(), deque()
+        self._max_y, self._min_y = deque(), deque()
+
+    def push(self, times, xs, ys):
+        """Appends a chunk of samples and returns the fixations closed by it."""
+        self._t.extend(np.asarray(times, dtype=float).tolist())
+        self._x.extend(np.asarray(xs, dtype=float).tolist())
+        self._y.extend(np.asarray(ys, dtype=float).tolist())
+        return self._scan()
+
+    def _scan(self):
+        t, x, y, off = self._t, self._x, self._y, self._offset
+        max_x, min_x, max_y, min_y = self._max_x, self._min_x, self._max_y, self._min_y
+        i, j, added = self._i, self._j, self._added
+        end = off + len(t)
+        closed = []
+
+        if added < i < end:
+            # Seed the extrema with the window's first sample. Later windows start at an
+            # index that has already been added, so this only happens for the first one.
+            for dq in (max_x, min_x, max_y, min_y):
+                dq.clear()
+                dq.append(i)
+            added = i
+
+        while j < end:
+            if j > added:
+                k = j - off
+                xj, yj = x[k], y[k]
+                while max_x and x[max_x[-1] - off] <= xj: max_x.pop()
+                while min_x and x[min_x[-1] - off] >= xj: min_x.pop()
+                while max_y and y[max_y[-1] - off] <= yj: max_y.pop()
+                while min_y and y[min_y[-1] - off] >= yj: min_y.pop()
+                max_x.append(j); min_x.append(j); max_y.append(j); min_y.append(j)
+                added = j
+
+            dx = x[max_x[0] - off] - x[min_x[0] - off]
+            dy = y[max_y[0] - off] - y[min_y[0] - off]
+            if (dx + dy) > self.dispersion:
+                # Dispersion broken at j: the window [i, j) is a fixation if long enough
+                if t[j - off] - t[i - off] >= self.duration_min:
+                    closed.append(self._record(i, j))
+                    i = j
+                else:
+                    i += 1
+                if j <= i:
+                    j = i + 1
+                for dq in (max_x, min_x, max_y, min_y):
+                    while dq[0] < i: dq.popleft()
+            else:
+                j += 1
+
+        self._i, self._j, self._added = i, j, added
+        self._discard_before(i)
+        return closed
+
+    def _record(self, i, j):
+        off = self._offset
+        last = j if self.include_break_sample else j - 1  # Sample j is always still buffered here
+        return {
+            'start_idx': i,
+            'stop_idx': j,
+            'start_time': self._t[i - off],
+            'end_time': self._t[j - 1 - off],
+            'duration': self._t[last - off] - self._t[i - off],
+            'x': np.mean(self._x[i - off:last + 1 - off]),
+            'y': np.mean(self._y[i - off:last + 1 - off]),
+            'count': j - i
+        }
+
+    def _discard_before(self, index):
+        # Drop samples that can no longer be part of a window
+        drop = index - self._offset
+        if drop > 0 and drop * 2 >= len(self._t):
+            del self._t[:drop], self._x[:drop], self._y[:drop]
+            self._offset = index
+
+
+def detect_fixations_idt(times, xs, ys, dispersion=0.05, duration_min=0.1, include_break_sample=False):
+    """Runs I-DT over whole arrays and returns the list of fixation records."""
+    return StreamingIDT(dispersion, duration_min, include_break_sample).push(times, xs, ys)
+
+
+def _fixation_runs(times, xs, ys, is_fixation, duration_min):
+    # Records for every run of fixation samples lasting at least duration_min, in the I-DT schema
+    is_fixation = np.asarray(is_fixation, dtype=bool)
+    edges = np.diff(np.concatenate(([0], is_fixation.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)  # exclusive
+    keep = times[stops - 1] - times[starts] >= duration_min
+    starts, stops = starts[keep], stops[keep]
+    if len(starts) == 0:
+        return []
+    # Sums over [start, stop) from the cumulative sums of the coordinates
+    counts = stops - starts
+    csum_x = np.concatenate(([0.0], np.cumsum(xs)))
+    csum_y = np.concatenate(([0.0], np.cumsum(ys)))
+    mean_x = (csum_x[stops] - csum_x[starts]) / counts
+    mean_y = (csum_y[stops] - csum_y[starts]) / counts
+    return [{
+        'start_idx': int(i),
+        'stop_idx': int(j),
+        'start_time': times[i],
+        'end_time': times[j - 1],
+        'duration': times[j - 1] - times[i],
+        'x': float(mx),
+        'y': float(my),
+        'count': int(j - i)
+    } for i, j, mx, my in zip(starts, stops, mean_x, mean_y)]
+
+
+def sample_velocities(times, xs, ys):
+    """
+    Gaze speed (normalized units per second) at each sample, measured between its
+    two neighbours; the central difference halves the jitter of point-to-point speed.
+    """
+    times = np.asarray(times, dtype=float)
+    n = len(times)
+    if n < 2:
+        return np.zeros(n)
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    before = np.maximum(np.arange(n) - 1, 0)
+    after = np.minimum(np.arange(n) + 1, n - 1)
+    dt = times[after] - times[before]
+    distance = np.hypot(xs[after] - xs[before], ys[after] - ys[before])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        speed = distance / dt
+    speed[~(dt > 0)] = np.inf  # Duplicate timestamps: no usable speed
+    return speed
+
+
+def detect_fixations_ivt(times, xs, ys, velocity_threshold=1.5, duration_min=0.1):
+    """
+    I-VT (Velocity-Threshold) fixation detection in one vectorized pass: samples
+    slower than velocity_threshold (normalized units/s; 1.5 is about 30 deg/s on a
+    typical screen) are fixation samples, and each run of them lasting at least
+    duration_min is a fixation.
+    """
+    times = np.asarray(times, dtype=float)
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    slow = sample_velocities(times, xs, ys) < velocity_threshold
+    return _fixation_runs(times, xs, ys, slow, duration_min)
+
+
+def _viterbi_two_state(log_emission, log_transition, log_start):
+    # Most likely state path for a 2-state HMM; log_emission has shape (n, 2)
+    n = len(log_emission)
+    e0, e1 = log_emission[:, 0].tolist(), log_emission[:, 1].tolist()
+    (t00, t01), (t10, t11) = log_transition.tolist()
+    s0, s1 = log_start[0] + e0[0], log_start[1] + e1[0]
+    back0, back1 = [0] * n, [0] * n
+    for k in range(1, n):
+        a, b = s0 + t00, s1 + t10
+        c, d = s0 + t01, s1 + t11
+        if a >= b:
+            s0_new = a + e0[k]
+        else:
+            s0_new = b + e0[k]
+            back0[k] = 1
+        if c >= d:
+            s1_new = c + e1[k]
+        else:
+            s1_new = d + e1[k]
+            back1[k] = 1
+        s0, s1 = s0_new, s1_new
+    states = np.empty(n, dtype=np.int8)
+    state = 0 if s0 >= s1 else 1
+    for k in range(n - 1, -1, -1):
+        states[k] = state
+        state = back0[k] if state == 0 else back1[k]
+    return states
+
+
+def detect_fixations_ihmm(times, xs, ys, velocity_threshold=1.5, duration_min=0.1, iterations=3):
+    """
+    I-HMM fixation detection: a two-state (fixation/saccade) hidden Markov model
+    over log gaze speed. It starts from the I-VT labelling, then alternates Viterbi
+    decoding and re-estimating the Gaussian emissions and the transition
+    probabilities from the decoded path. Slower than I-VT, but it adapts to each
+    recording's noise level instead of relying on a fixed threshold.
+    """
+    times = np.asarray(times, dtype=float)
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    if len(times) < 2:
+        return []
+    speed = sample_velocities(times, xs, ys)
+    log_speed = np.log(np.clip(speed, 1e-6, 1e6))
+    states = (speed >= velocity_threshold).astype(np.int8)  # 0 = fixation, 1 = saccade
+
+    for _ in range(iterations):
+        log_emission = np.empty((len(speed), 2))
+        for s in (0, 1):
+            values = log_speed[states == s]
+            if len(values) < 2:
+                # One state vanished: nothing left to separate
+                return _fixation_runs(times, xs, ys, states == 0, duration_min)
+            mean, var = values.mean(), max(values.var(), 1e-6)
+            log_emission[:, s] = -0.5 * (np.log(2 * np.pi * var) + (log_speed - mean) ** 2 / var)
+        pairs = np.bincount(states[:-1] * 2 + states[1:], minlength=4).reshape(2, 2) + 1.0
+        log_transition = np.log(pairs / pairs.sum(axis=1, keepdims=True))
+        log_start = np.log(np.bincount(states, minlength=2) + 1.0) - np.log(len(states) + 2.0)
+        new_states = _viterbi_two_state(log_emission, log_transition, log_start)
+        if np.array_equal(new_states, states):
+            break
+        states = new_states
+
+    return _fixation_runs(times, xs, ys, states == 0, duration_min)
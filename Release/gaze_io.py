@@ -0,0 +1,184 @@
+# gaze_io.py
+import os
+import re
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Binary sidecar written next to each gaze text file (gazeData.txt -> gazeData.gzb).
+# Layout: an int64 header followed by the time, x and y columns as float64.
+SIDECAR_EXT = '.gzb'
+SIDECAR_MAGIC = 0x315A47  # "GZ1"
+SIDECAR_VERSION = 1
+HEADER_FIELDS = 5  # magic, version, sample count, source size, source mtime (ns)
+HEADER_BYTES = HEADER_FIELDS * 8
+
+EPOCH = datetime(1970, 1, 1)
+
+_NUMBER = rb'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|[-+]?(?:nan|inf)'
+_GAZE_LINE = re.compile(
+    rb'\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{1,6})\] Gaze point: \[(' + _NUMBER + rb'), (' + _NUMBER + rb')\]')
+_BLANK_LINE_START = re.compile(rb'\n(?=[ \t\r]*(?:\n|\Z))')
+
+
+def to_datetime(seconds):
+    """Converts a time value from the gaze arrays back to the recorded wall-clock datetime."""
+    return EPOCH + timedelta(seconds=float(seconds))
+
+
+def _count_non_blank_lines(data):
+    # Every line is preceded by a newline once one is prepended to the data
+    segments = data.count(b'\n') + 1
+    return segments - len(_BLANK_LINE_START.findall(b'\n' + data))
+
+
+def _timestamps_to_seconds(stamps):
+    """Converts a sequence of timestamp byte strings to seconds, NaN where a stamp is invalid."""
+    try:
+        return np.array(stamps, dtype='datetime64[us]').astype(np.int64) / 1e6
+    except ValueError:
+        # An out-of-range field somewhere (e.g. month 13): fall back to converting one by one
+        seconds = np.full(len(stamps), np.nan)
+        for k, stamp in enumerate(stamps):
+            try:
+                seconds[k] = np.datetime64(stamp.decode(), 'us').astype(np.int64) / 1e6
+            except ValueError:
+                pass
+        return seconds
+
+
+def parse_gaze_bytes(data):
+    """
+    Parses the contents of a '[timestamp] Gaze point: [x, y]' file in bulk.
+    Returns float64 arrays (time, x, y) and the number of non-blank lines that
+    were rejected as malformed. Time is seconds since 1970-01-01 of the naive
+    recorded timestamp.
+    """
+    matches = _GAZE_LINE.findall(data)
+    rejected = max(_count_non_blank_lines(data) - len(matches), 0)
+    if not matches:
+        empty = np.empty(0, dtype=np.float64)
+        return empty, empty.copy(), empty.copy(), rejected
+
+    stamps, x_str, y_str = zip(*matches)
+    times = _timestamps_to_seconds(stamps)
+    xs = np.array(x_str, dtype=np.float64)
+    ys = np.array(y_str, dtype=np.float64)
+
+    valid = ~np.isnan(times)
+    if not valid.all():
+        rejected += int((~valid).sum())
+        times, xs, ys = times[valid], xs[valid], ys[valid]
+    return times, xs, ys, rejected
+
+
+def parse_gaze_text(file_path):
+    """Reads a whole gaze text file and parses it with parse_gaze_bytes."""
+    with open(file_path, 'rb') as f:
+        return parse_gaze_bytes(f.read())
+
+
+def iter_gaze_chunks(file_path, chunk_bytes=64 * 1024 * 1024):
+    """
+    Parses a gaze text file about chunk_bytes of whole lines at a time, yielding
+    the parse_gaze_bytes result of each chunk, so memory stays bounded for any file size.
+    """
+    with open(file_path, 'rb') as f:
+        while True:
+            lines = f.readlines(chunk_bytes)
+            if not lines:
+                break
+            yield parse_gaze_bytes(b''.join(lines))
+
+
+def format_gaze_lines(times, xs, ys):
+    """The recorder's '[timestamp] Gaze point: [x, y]' lines for arrays of samples."""
+    micros = np.round(np.asarray(times, dtype=float) * 1e6).astype(np.int64).astype('datetime64[us]')
+    stamps = np.char.replace(np.datetime_as_string(micros, unit='us'), 'T', ' ')
+    return ''.join(f"[{stamp}] Gaze point: [{x}, {y}]\n"
+                   for stamp, x, y in zip(stamps.tolist(), np.asarray(xs).tolist(), np.asarray(ys).tolist()))
+
+
+def write_gaze_text(f, times, xs, ys, chunk_size=1_000_000):
+    """Writes samples to an open text file in the recorder's format, chunk_size lines at a time."""
+    for start in range(0, len(times), chunk_size):
+        stop = start + chunk_size
+        f.write(format_gaze_lines(times[start:stop], xs[start:stop], ys[start:stop]))
+
+
+def sidecar_path(file_path):
+    return os.path.splitext(file_path)[0] + SIDECAR_EXT
+
+
+def _source_signature(file_path):
+    st = os.stat(file_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def write_sidecar(file_path, times, xs, ys, signature=None):
+    """
+    Writes the binary sidecar for a gaze text file. `signature` is the text file's
+    (size, mtime) taken before it was read; the sidecar is discarded if the file has
+    changed since, e.g. by a recorder appending to it. Returns False if it was not written.
+    """
+    if signature is None:
+        signature = _source_signature(file_path)
+    size, mtime_ns = signature
+    header = np.array([SIDECAR_MAGIC, SIDECAR_VERSION, len(times), size, mtime_ns], dtype='<i8')
+    columns = np.vstack([times, xs, ys]).astype('<f8', copy=False)
+    target = sidecar_path(file_path)
+    tmp_path = target + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(header.tobytes())
+            f.write(np.ascontiguousarray(columns).tobytes())
+        if _source_signature(file_path) != tuple(signature):
+            os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, target)
+        return True
+    except OSError as e:
+        print(f"Could not write gaze sidecar {target}: {e}")
+        return False
+
+
+def read_sidecar(file_path):
+    """
+    Memory-maps the sidecar of a gaze text file and returns (time, x, y),
+    or None if it is missing or no longer matches the text file.
+    """
+    path = sidecar_path(file_path)
+    if not os.path.exists(path) or not os.path.exists(file_path):
+        return None
+    try:
+        header = np.fromfile(path, dtype='<i8', count=HEADER_FIELDS)
+        if len(header) < HEADER_FIELDS or header[0] != SIDECAR_MAGIC or header[1] != SIDECAR_VERSION:
+            return None
+        if tuple(int(v) for v in header[3:5]) != _source_signature(file_path):
+            return None
+        n = int(header[2])
+        if os.path.getsize(path) != HEADER_BYTES + 3 * n * 8:
+            return None
+        if n == 0:
+            empty = np.empty(0, dtype=np.float64)
+            return empty, empty.copy(), empty.copy()
+        columns = np.memmap(path, dtype='<f8', mode='r', offset=HEADER_BYTES, shape=(3, n))
+        return columns[0], columns[1], columns[2]
+    except (OSError, ValueError):
+        return None
+
+
+def load_gaze_arrays(file_path):
+    """
+    Returns (time, x, y) for a gaze text file, using the binary sidecar when it
+    is up to date and rebuilding it from the text otherwise.
+    """
+    cached = read_sidecar(file_path)
+    if cached is not None:
+        return cached
+    signature = _source_signature(file_path)  # Before reading, so a concurrent append is noticed
+    times, xs, ys, rejected = parse_gaze_text(file_path)
+    if rejected:
+        print(f"Skipped {rejected} malformed lines in {file_path}")
+    write_sidecar(file_path, times, xs, ys, signature)
+    return times, xs, ys
@@ -0,0 +1,100 @@
+# gaze_protocol.py
+"""
+Wire format of the binary gaze transport (gaze_transport.py), shared by the app
+and the recorder side without Qt. Records are three little-endian float64s:
+time (seconds since 1970-01-01 of the naive local timestamp, as in gaze_io), x
+and y. An address is a Unix domain socket path, or 'tcp:HOST:PORT' where those
+are unavailable.
+"""
+import queue
+import socket
+
+import numpy as np
+
+from gaze_io import format_gaze_lines
+
+RECORD_DTYPE = np.dtype([('time', '<f8'), ('x', '<f8'), ('y', '<f8')])
+RECORD_BYTES = RECORD_DTYPE.itemsize
+
+
+def connect(address):
+    """Recorder side: opens the socket named by a reader's address."""
+    if address.startswith('tcp:'):
+        host, port = address[4:].rsplit(':', 1)
+        sock = socket.create_connection((host, int(port)))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(address)
+    return sock
+
+
+def encode_records(times, xs, ys):
+    records = np.empty(len(times), dtype=RECORD_DTYPE)
+    records['time'], records['x'], records['y'] = times, xs, ys
+    return records.tobytes()
+
+
+class GazeRecordReceiver:
+    """
+    Receiving end of one connection: reassembles records split across recv calls,
+    appends them to the archive text file and, with live=True, queues them for
+    read_new(), holding at most max_pending received batches. When the consumer
+    falls behind the queue fills, receiving stops, and the socket buffers fill
+    until the sender's sends block. `interrupted()` is polled every poll_interval.
+    """
+    def __init__(self, live=True, max_pending=256, poll_interval=0.05, interrupted=None):
+        self.poll_interval = poll_interval
+        self.received = 0
+        self._queue = queue.Queue(maxsize=max_pending) if live else None
+        self._interrupted = interrupted or (lambda: False)
+
+    def receive(self, connection, archive):
+        """Receives until the sender closes the connection (returns True) or interrupted() (False)."""
+        connection.settimeout(self.poll_interval)
+        buffer = bytearray(RECORD_BYTES * 4096)
+        pending = 0  # Bytes of an incomplete record at the start of buffer
+        while not self._interrupted():
+            try:
+                n = connection.recv_into(memoryview(buffer)[pending:])
+            except socket.timeout:
+                continue
+            if n == 0:
+                return True
+            pending += n
+            complete = pending - pending % RECORD_BYTES
+            if complete:
+                records = np.frombuffer(bytes(buffer[:complete]), dtype=RECORD_DTYPE)
+                buffer[:pending - complete] = buffer[complete:pending]
+                pending -= complete
+                self._deliver(records, archive)
+        return False
+
+    def _deliver(self, records, archive):
+        times, xs, ys = records['time'], records['x'], records['y']
+        archive.write(format_gaze_lines(times, xs, ys))
+        archive.flush()  # Keep the archive readable by file-based tools while recording
+        self.received += len(records)
+        if self._queue is None:
+            return
+        # Blocks while the consumer is behind: the backpressure reaches the sender through the socket
+        while not self._interrupted():
+            try:
+                self._queue.put((times, xs, ys), timeout=self.poll_interval)
+                return
+            except queue.Full:
+                continue
+
+    def read_new(self):
+        """Returns (times, xs, ys) of all samples received since the last call (the GazeFileTailer interface)."""
+        batches = []
+        if self._queue is not None:
+            while True:
+                try:
+                    batches.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+        if not batches:
+            empty = np.empty(0)
+            return empty, empty, empty
+        return tuple(np.concatenate(column) for column in zip(*batches))
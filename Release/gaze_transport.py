@@ -0,0 +1,84 @@
+# gaze_transport.py
+"""
+Optional binary transport from the recorder to the app. Instead of only writing
+the text file, the recorder connects to a local socket (a Unix domain socket, or
+TCP on localhost where those are unavailable) and sends fixed-size records in
+the wire format of gaze_protocol.py.
+
+GazeSocketReader receives them on a QThread, still writes the usual gaze text
+file as the session archive, and hands the samples to a live consumer through a
+bounded queue. When the consumer falls behind the queue fills, the reader stops
+reading, and the socket buffers fill until the recorder's sends block.
+"""
+import os
+import socket
+import tempfile
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from gaze_protocol import GazeRecordReceiver
+
+
+class GazeSocketReader(QThread):
+    """
+    Accepts one recorder connection and receives its gaze records. The socket is
+    bound on construction, so `address` can be passed to the recorder before start().
+    With live=True the samples are also queued for read_new(), holding at most
+    max_pending received batches.
+    """
+    recorder_disconnected = pyqtSignal()
+
+    def __init__(self, archive_path, live=True, max_pending=256, poll_interval=0.05):
+        super().__init__()
+        self.archive_path = archive_path
+        self.poll_interval = poll_interval
+        self._receiver = GazeRecordReceiver(live, max_pending, poll_interval, self.isInterruptionRequested)
+        self._socket_path = None
+        if hasattr(socket, 'AF_UNIX'):
+            self._socket_path = os.path.join(tempfile.mkdtemp(prefix='gazelexia-'), 'gaze.sock')
+            self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._server.bind(self._socket_path)
+            self.address = self._socket_path
+        else:
+            self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._server.bind(('127.0.0.1', 0))
+            self.address = 'tcp:127.0.0.1:%d' % self._server.getsockname()[1]
+        self._server.listen(1)
+        self._server.settimeout(poll_interval)
+
+    def run(self):
+        try:
+            connection = self._accept()
+            if connection is None:
+                return
+            with connection, open(self.archive_path, 'a') as archive:
+                if self._receiver.receive(connection, archive):
+                    self.recorder_disconnected.emit()
+        finally:
+            self._server.close()
+            if self._socket_path:
+                try:
+                    os.remove(self._socket_path)
+                    os.rmdir(os.path.dirname(self._socket_path))
+                except OSError:
+                    pass
+
+    def _accept(self):
+        while not self.isInterruptionRequested():
+            try:
+                connection, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            return connection
+        return None
+
+    @property
+    def received(self):
+        return self._receiver.received
+
+    def read_new(self):
+        """Returns (times, xs, ys) of all samples received since the last call (the GazeFileTailer interface)."""
+        return self._receiver.read_new()
+
+    def close(self):
+        pass  # The socket is closed by run(); read_new() needs no cleanup
@@ -0,0 +1,47 @@
+# live_analysis.py
+"""
+Analysis while a session is being recorded. The recorder's growing gaze file is
+tailed (each poll reads only the bytes appended since the previous one), every
+new sample is calibrated and fed to the streaming I-DT detector, and running
+metrics are published about once per second.
+"""
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from live_metrics import GazeFileTailer, LiveSessionAnalysis
+
+
+class LiveAnalysisThread(QThread):
+    """
+    Analyses a recording as it arrives and emits the running metrics about once per second.
+    The source is the gaze file to tail, or any object with read_new() and close()
+    such as a gaze_transport.GazeSocketReader.
+    """
+    metrics_updated = pyqtSignal(object)  # dict from LiveSessionAnalysis.metrics(), plus 'sample_rate'
+
+    def __init__(self, source, calibration=None, poll_interval=0.1, publish_interval=1.0):
+        super().__init__()
+        self.tailer = GazeFileTailer(source) if isinstance(source, str) else source
+        self.analysis = LiveSessionAnalysis(calibration)
+        self.poll_interval = poll_interval
+        self.publish_interval = publish_interval
+
+    def run(self):
+        last_publish = time.monotonic()
+        samples_at_publish = 0
+        try:
+            while not self.isInterruptionRequested():
+                self.analysis.push(*self.tailer.read_new())
+                now = time.monotonic()
+                if now - last_publish >= self.publish_interval:
+                    metrics = self.analysis.metrics()
+                    metrics['sample_rate'] = (metrics['samples'] - samples_at_publish) / (now - last_publish)
+                    samples_at_publish = metrics['samples']
+                    last_publish = now
+                    self.metrics_updated.emit(metrics)
+                self.msleep(int(self.poll_interval * 1000))
+            # Whatever the recorder wrote before it stopped, so analysis.metrics() covers the whole session
+            self.analysis.push(*self.tailer.read_new())
+        finally:
+            self.tailer.close()
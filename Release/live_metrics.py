@@ -0,0 +1,136 @@
+# live_metrics.py
+"""
+The Qt-free part of the live analysis (live_analysis.py): tailing the growing
+gaze file and running metrics over the samples as they arrive.
+"""
+import os
+
+import numpy as np
+
+from analysis_engine import ScreeningReport
+from fixations import StreamingIDT
+from gaze_io import parse_gaze_bytes
+from saccades import classify_saccades
+
+
+class GazeFileTailer:
+    """Incrementally parses a gaze text file that another process is appending to."""
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._file = None
+        self._offset = 0
+        self._partial = b''  # Bytes of a line the recorder has not finished writing
+        self.rejected = 0
+
+    def read_new(self):
+        """Returns (times, xs, ys) of the complete lines appended since the last call."""
+        if self._file is None:
+            try:
+                self._file = open(self.file_path, 'rb')
+            except OSError:
+                return self._empty()
+        if os.fstat(self._file.fileno()).st_size < self._offset:
+            # Truncated (a new recording into the same file): start over
+            self._offset, self._partial = 0, b''
+        self._file.seek(self._offset)
+        data = self._file.read()
+        self._offset += len(data)
+
+        data = self._partial + data
+        end = data.rfind(b'\n') + 1
+        self._partial = data[end:]
+        if not end:
+            return self._empty()
+        times, xs, ys, rejected = parse_gaze_bytes(data[:end])
+        self.rejected += rejected
+        return times, xs, ys
+
+    @staticmethod
+    def _empty():
+        empty = np.empty(0)
+        return empty, empty, empty
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class LiveSessionAnalysis:
+    """
+    Running fixation and saccade metrics over samples pushed in arrival order.
+    Only sums are kept, so each push costs time proportional to the new samples.
+    """
+    def __init__(self, calibration=None, dispersion=0.05, duration_min=0.1, interpretation=None):
+        self.calibration = calibration
+        # I-DT as the screening analysis defines it (session_analysis.session_fixation_stage)
+        self.detector = StreamingIDT(dispersion, duration_min, include_break_sample=True)
+        self.interpretation = interpretation or ScreeningReport()
+        self.samples = 0
+        self.invalid_samples = 0
+        self.last_sample_time = None
+        self.fixations = 0
+        self._fixation_time = 0.0
+        self._previous = None  # (x, y) of the last fixation
+        self.n_forward = 0
+        self.n_regression = 0
+        # Welford accumulators for the forward saccade length
+        self._fwd_mean = 0.0
+        self._fwd_m2 = 0.0
+
+    def push(self, times, xs, ys):
+        """Adds raw samples; returns the number of fixations they closed."""
+        times = np.asarray(times, dtype=float)
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        valid = np.isfinite(xs) & np.isfinite(ys)
+        self.samples += len(times)
+        self.invalid_samples += int((~valid).sum())
+        if len(times):
+            self.last_sample_time = times[-1]
+        times, xs, ys = times[valid], xs[valid], ys[valid]
+        if self.calibration is not None:
+            if len(xs) == 1:
+                # The common case at high poll rates; transform_point skips the array setup
+                x, y = self.calibration.transform_point(xs[0], ys[0])
+                xs, ys = np.array([x]), np.array([y])
+            elif len(xs):
+                calibrated = self.calibration.transform(np.column_stack((xs, ys)))
+                xs, ys = calibrated[:, 0], calibrated[:, 1]
+
+        closed = self.detector.push(times, xs, ys)
+        for fix in closed:
+            self._add_fixation(fix)
+        return len(closed)
+
+    def _add_fixation(self, fix):
+        self.fixations += 1
+        self._fixation_time += fix['duration']
+        if self._previous is not None:
+            dx, dy = fix['x'] - self._previous[0], fix['y'] - self._previous[1]
+            kind = classify_saccades([dx], [dy])[0]
+            if kind == 'forward':
+                self.n_forward += 1
+                distance = np.hypot(dx, dy)
+                delta = distance - self._fwd_mean
+                self._fwd_mean += delta / self.n_forward
+                self._fwd_m2 += delta * (distance - self._fwd_mean)
+            elif kind == 'regression':
+                self.n_regression += 1
+        self._previous = (fix['x'], fix['y'])
+
+    def metrics(self):
+        """The running values of the metrics the results window reports."""
+        reading = self.n_forward + self.n_regression
+        metrics = {
+            'samples': self.samples,
+            'invalid_samples': self.invalid_samples,
+            'n_fixations': self.fixations,
+            'n_forward': self.n_forward,
+            'n_regression': self.n_regression,
+            'avg_fixation_duration': self._fixation_time / self.fixations if self.fixations else 0.0,
+            'regression_rate': self.n_regression / reading if reading else 0.0,
+            'saccade_length_std': np.sqrt(self._fwd_m2 / (self.n_forward - 1)) if self.n_forward > 1 else 0.0
+        }
+        metrics['report'] = self.interpretation(metrics) if self.fixations > 1 else None
+        return metrics
@@ -1,13 +1,33 @@
 # main.py
 from PyQt5.QtWidgets import QApplication
-import sys
+from PyQt5.QtCore import QTimer
+import importlib, sys, threading
 from ui_components import GazeVisualizer
+from config import app_config
+
+# Loaded on first use by GazeVisualizer; pre-warmed in the background once the window is up
+DEFERRED_MODULES = ('results_window', 'calibration', 'live_analysis', 'gaze_transport')
+
+def prewarm_modules(modules=DEFERRED_MODULES):
+    # Only imports: no widgets are created off the GUI thread. A click that needs a
+    # module still being imported simply waits for that import to finish.
+    def load():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                print(f"Could not pre-load {name}: {e}")
+    thread = threading.Thread(target=load, name='prewarm-imports', daemon=True)
+    thread.start()
+    return thread
 
 def main():
     app = QApplication(sys.argv)
     screen = app.primaryScreen()
     main_window = GazeVisualizer(screen.size().width(), screen.size().height())
     main_window.showFullScreen()
+    if app_config.prewarm_imports:
+        QTimer.singleShot(0, prewarm_modules)  # After the first paint has been queued
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
@@ -17,4 +37,4 @@ if __name__ == "__main__":
 #saat tarih şeklinde recording session     
 #metni büyütme daha yukarı ve aşağı genisleme   TMM
 #toggle buttons
-#installer
\ No newline at end of file
+#installer
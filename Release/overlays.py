@@ -1,7 +1,7 @@
 # overlays.py
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtGui import QPainter, QColor, QFont
-from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QPainter, QColor, QFont, QImage
+from PyQt5.QtCore import Qt, QRectF
 
 import numpy as np
 
@@ -16,28 +16,130 @@ class Overlay(QWidget):
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
         self.setAttribute(Qt.WA_TranslucentBackground)
 
+def gaussian_smooth(grid, sigma):
+    """Separable Gaussian blur of a 2D array; sigma is in bins."""
+    radius = min(max(int(3 * sigma), 1), (min(grid.shape) - 1) // 2)
+    offsets = np.arange(-radius, radius + 1)
+    kernel = np.exp(-0.5 * (offsets / sigma) ** 2)
+    kernel /= kernel.sum()
+    grid = np.apply_along_axis(np.convolve, 0, grid, kernel, mode='same')
+    return np.apply_along_axis(np.convolve, 1, grid, kernel, mode='same')
+
 class HeatmapOverlay(Overlay):
-    """ Displays a heatmap based on gaze points. """
-    def __init__(self, gaze_points, word_hit_data, parent=None):
+    """
+    Displays a heatmap based on gaze points.
+    The histogram is kept between paints and colour-mapped into a cached QImage;
+    paintEvent only blits it. Points can be accumulated live with add_points: they
+    are kept as a list of chunks, and points that fall inside the current bins only
+    repaint the bins they touch. The cache is rebuilt when the bins change, the peak
+    count grows, smoothing is on, or the widget is resized.
+    """
+    def __init__(self, gaze_points, word_hit_data, parent=None, smooth_sigma=0):
         super().__init__(parent)
-        self.gaze_points = gaze_points
         self.word_hit_data = word_hit_data
         self.bins = max(min(parent.width(), parent.height()) // 50, 10)
+        self.smooth_sigma = smooth_sigma  # Gaussian smoothing in bins; 0 draws raw counts
+        self._chunks = []
+        self._low = self._high = None  # Data range over all chunks
+        self.counts = np.zeros((self.bins, self.bins))
+        self.xedges = self.yedges = None
+        self._pixels = None  # Colour-mapped histogram of the cached image, rows are y bins
+        self._peak = 0.0
+        self._cached_image = None
+        self.add_points(gaze_points)
+
+    @property
+    def gaze_points(self):
+        """All points added so far as one (n, 2) array."""
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks)]
+        return self._chunks[0] if self._chunks else np.empty((0, 2))
+
+    def add_points(self, points):
+        """Adds screen-space (x, y) points to the histogram."""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if not len(points):
+            return
+        self._chunks.append(points)
+        low, high = points.min(axis=0), points.max(axis=0)
+        inside = self.xedges is not None and \
+            low[0] >= self.xedges[0] and high[0] <= self.xedges[-1] and \
+            low[1] >= self.yedges[0] and high[1] <= self.yedges[-1]
+        if inside:
+            counts, _, _ = np.histogram2d(points[:, 0], points[:, 1], bins=(self.xedges, self.yedges))
+            self.counts += counts
+            self._update_bins(counts > 0)
+        else:
+            # The data range grew, so the bin edges change: rebin every point
+            self._low = low if self._low is None else np.minimum(self._low, low)
+            self._high = high if self._high is None else np.maximum(self._high, high)
+            self.xedges = np.histogram_bin_edges([self._low[0], self._high[0]], self.bins)
+            self.yedges = np.histogram_bin_edges([self._low[1], self._high[1]], self.bins)
+            points = self.gaze_points  # Merges the chunks, so live updates do not pile up small ones
+            self.counts, _, _ = np.histogram2d(points[:, 0], points[:, 1], bins=(self.xedges, self.yedges))
+            self.invalidate()
+
+    def set_smoothing(self, sigma):
+        self.smooth_sigma = sigma
+        self.invalidate()
+
+    def invalidate(self):
+        self._cached_image = None
+        self.update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._cached_image = None
+
+    def _bin_rect(self, x0, x1, y0, y1):
+        # Widget-space rectangle covering bins [x0, x1) x [y0, y1)
+        return QRectF(self.xedges[x0], self.yedges[y0],
+                      self.xedges[x1] - self.xedges[x0], self.yedges[y1] - self.yedges[y0])
+
+    def _update_bins(self, touched):
+        """Repaints only the touched bins of the cached image, if nothing else changed."""
+        peak = self.counts.max()
+        if self._cached_image is None or self.smooth_sigma > 0 or peak != self._peak:
+            self.invalidate()  # Every bin's colour changes
+            return
+        ix, iy = np.nonzero(touched)
+        self._pixels[iy, ix] = self._colour_map(self.counts[ix, iy])
+        x0, x1, y0, y1 = ix.min(), ix.max() + 1, iy.min(), iy.max() + 1
+        target = self._bin_rect(x0, x1, y0, y1)
+        qp = QPainter(self._cached_image)
+        qp.setCompositionMode(QPainter.CompositionMode_Source)
+        qp.drawImage(target, self._heatmap_image(), QRectF(x0, y0, x1 - x0, y1 - y0))
+        qp.end()
+        self.update(target.toAlignedRect())
+
+    def _colour_map(self, counts):
+        # Red with alpha = intensity relative to the peak, as ARGB32 pixels
+        intensity = counts / self._peak if self._peak > 0 else counts
+        alpha = (255 * intensity).astype(np.uint32)
+        return (alpha << 24) | (255 << 16)
+
+    def _heatmap_image(self):
+        """The colour-mapped histogram as a bins x bins ARGB image."""
+        height, width = self._pixels.shape
+        return QImage(self._pixels.data, width, height, width * 4, QImage.Format_ARGB32).copy()
+
+    def _render_cache(self):
+        image = QImage(self.size(), QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.transparent)
+        if self.xedges is not None:
+            heatmap = gaussian_smooth(self.counts, self.smooth_sigma) if self.smooth_sigma > 0 else self.counts
+            self._peak = heatmap.max()
+            self._pixels = np.ascontiguousarray(self._colour_map(heatmap.T))  # rows are y bins
+            qp = QPainter(image)
+            qp.drawImage(self._bin_rect(0, self.bins, 0, self.bins), self._heatmap_image())
+            qp.end()
+        return image
 
     def paintEvent(self, event):
+        if self._cached_image is None or self._cached_image.size() != self.size():
+            self._cached_image = self._render_cache()
         qp = QPainter(self)
-        qp.setRenderHint(QPainter.Antialiasing)
-        gaze_points_xy = [(point[0], point[1]) for point in self.gaze_points]
-        heatmap, xedges, yedges = np.histogram2d(*zip(*gaze_points_xy), bins=(self.bins, self.bins))
-        heatmap /= np.max(heatmap)
-
-        for i in range(len(xedges)-1):
-            for j in range(len(yedges)-1):
-                intensity = heatmap[i, j]
-                color = QColor(255, 0, 0, int(255 * intensity))
-                qp.setBrush(color)
-                qp.setPen(Qt.NoPen)
-                qp.drawRect(QRect(int(xedges[i]), int(yedges[j]), int(xedges[i+1] - xedges[i]), int(yedges[j+1] - yedges[j])))
+        qp.drawImage(0, 0, self._cached_image)
 
         qp.setPen(QColor(0, 0, 0))
         font = QFont('Arial', 10)
@@ -0,0 +1,96 @@
+# plotting.py
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.transforms import blended_transform_factory
+
+
+def decimate_minmax(t, y, n_columns, t_range=None):
+    """
+    Reduces a trace to at most two samples (its min and max, in time order) per
+    column of n_columns equal time buckets over t_range. At one column per pixel
+    the drawn line looks the same as the full trace. t must be sorted.
+    """
+    t = np.asarray(t, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if t_range is not None:
+        lo, hi = np.searchsorted(t, t_range[0], 'left'), np.searchsorted(t, t_range[1], 'right')
+        # Keep one sample either side so the line still runs off the visible edges
+        t, y = t[max(lo - 1, 0):hi + 1], y[max(lo - 1, 0):hi + 1]
+    n_columns = max(int(n_columns), 1)
+    if len(t) <= 2 * n_columns:
+        return t, y
+
+    edges = np.searchsorted(t, np.linspace(t[0], t[-1], n_columns + 1)[1:-1])
+    starts = np.unique(np.concatenate(([0], edges)))
+    starts = starts[starts < len(t)]
+    ends = np.append(starts[1:], len(t))
+
+    # Sorting by (bucket, value) puts each bucket's min first and its max last
+    bucket = np.repeat(np.arange(len(starts)), ends - starts)
+    order = np.lexsort((y, bucket))
+    min_pos = order[starts]
+    max_pos = order[ends - 1]
+    idx = np.column_stack((np.minimum(min_pos, max_pos), np.maximum(min_pos, max_pos))).ravel()
+    return t[idx], y[idx]
+
+
+def plot_decimated(ax, t, y, **kwargs):
+    """
+    Plots a long trace min/max-decimated to the axes' pixel width, and re-decimates
+    the visible range whenever the x limits change (zoom/pan).
+    """
+    t = np.asarray(t, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(t) > 1 and np.any(np.diff(t) < 0):
+        order = np.argsort(t, kind='stable')
+        t, y = t[order], y[order]
+
+    def columns():
+        return max(int(ax.bbox.width), 100)
+
+    line, = ax.plot(*decimate_minmax(t, y, columns()), **kwargs)
+
+    def on_xlim_changed(axes):
+        line.set_data(*decimate_minmax(t, y, columns(), axes.get_xlim()))
+
+    ax.callbacks.connect('xlim_changed', on_xlim_changed)
+    return line
+
+
+def saccade_segments(fix_x, fix_y):
+    """(n-1, 2, 2) array of line segments between consecutive fixations."""
+    points = np.column_stack((np.asarray(fix_x, dtype=float), np.asarray(fix_y, dtype=float)))
+    return np.stack((points[:-1], points[1:]), axis=1)
+
+
+def add_scanpath(ax, fix_x, fix_y, types, styles, default=None):
+    """
+    Draws the saccades as one LineCollection per saccade type.
+    styles maps a type to LineCollection keyword arguments; other types use
+    default, or are skipped when default is None.
+    """
+    segments = saccade_segments(fix_x, fix_y)
+    types = np.asarray(types)
+    collections = []
+    for kind in np.unique(types):
+        style = styles.get(kind, default)
+        if style is None:
+            continue
+        collection = LineCollection(segments[types == kind], **style)
+        ax.add_collection(collection)
+        collections.append(collection)
+    ax.autoscale_view()
+    return collections
+
+
+def add_time_spans(ax, starts, ends, **kwargs):
+    """Shades many [start, end] time intervals over the full axes height as a single collection."""
+    starts = np.asarray(starts, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+    verts = np.stack([np.column_stack((starts, np.zeros_like(starts))),
+                      np.column_stack((starts, np.ones_like(starts))),
+                      np.column_stack((ends, np.ones_like(ends))),
+                      np.column_stack((ends, np.zeros_like(ends)))], axis=1)
+    collection = PolyCollection(verts, transform=blended_transform_factory(ax.transData, ax.transAxes), **kwargs)
+    ax.add_collection(collection)
+    return collection
@@ -1,57 +1,225 @@
-import os
-
-# --- CONFIGURATION ---
-# The file you want to fix (full path or relative)
-INPUT_FILE = "data/Aleyna_data/01_01_2026_20_12/gazeData_calibrated.txt" 
-
-# The name of the new fixed file
-OUTPUT_FILE = "gazeData_fixed.txt"
-
-# HOW MUCH TO SHIFT?
-# If text is HIGHER than dots -> You need to move dots UP.
-# Since Y=1 is Top and Y=-1 is Bottom:
-# ADD positive value (e.g., 0.15) to move dots UP.
-# SUBTRACT value (e.g., -0.15) to move dots DOWN.
-Y_OFFSET = 0.15  # Start with 0.15 and adjust as needed
-# ---------------------
-
-def repair_gaze_file():
-    if not os.path.exists(INPUT_FILE):
-        print(f"Error: Could not find {INPUT_FILE}")
-        return
-
-    print(f"Processing {INPUT_FILE}...")
-    print(f"Applying Y Offset: {Y_OFFSET}")
-
-    with open(INPUT_FILE, 'r') as infile, open(OUTPUT_FILE, 'w') as outfile:
-        count = 0
-        for line in infile:
-            if "Gaze point:" in line:
-                try:
-                    # Split the line to get coordinates
-                    prefix, gaze_part = line.split("Gaze point: ")
-                    coords_str = gaze_part.strip(" []\n")
-                    x_str, y_str = coords_str.split(",")
-                    
-                    x = float(x_str)
-                    y = float(y_str)
-
-                    # --- APPLY CORRECTION ---
-                    new_y = y + Y_OFFSET
-                    # ------------------------
-
-                    # Reconstruct the line
-                    new_line = f"{prefix}Gaze point: [{x}, {new_y}]\n"
-                    outfile.write(new_line)
-                    count += 1
-                except ValueError:
-                    outfile.write(line) # Write broken lines as-is
-            else:
-                outfile.write(line) # Write header/other lines as-is
-
-    print(f"Done! Fixed {count} lines.")
-    print(f"Saved to: {OUTPUT_FILE}")
-    print("Now, rename 'gazeData_fixed.txt' to 'gazeData_calibrated.txt' (backup the old one first!) and run Playback.")
-
-if __name__ == "__main__":
-    repair_gaze_file()
\ No newline at end of file
+# repair_data.py
+"""
+Corrects the calibrated gaze data of recorded sessions after the fact, e.g. when
+the dots sit consistently above or below the text during playback.
+
+A correction is an affine map (--x-offset/--y-offset and an optional 2x2 --matrix)
+or a polynomial calibration model (--model, a calibration_model.json), applied
+vectorized over large chunks of the file so any size is repaired in constant memory.
+With --fit-lines the vertical offset is fitted instead of guessed: the fixations
+are aligned to the y-bands of the text lines stored in the session's text layout manifest (text_layout.py).
+
+The repaired file atomically replaces gazeData_calibrated.txt. The first repair keeps
+the original as gazeData_calibrated.txt.bak; later repairs leave that backup alone.
+Remember that Y=1 is the top of the screen: a positive y offset moves the dots up.
+
+Usage: python repair_data.py SESSION_DIR [SESSION_DIR ...] [--y-offset DY] [--x-offset DX]
+                             [--matrix A,B,C,D] [--model PATH] [--fit-lines] [--dry-run] [--jobs N]
+"""
+import argparse
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from calibration_model import PolynomialCalibration, calibrate_gaze_file
+from fixations import StreamingIDT
+from gaze_io import iter_gaze_chunks
+from text_layout import load_word_layout
+
+GAZE_FILENAME = 'gazeData_calibrated.txt'
+BACKUP_SUFFIX = '.bak'
+
+
+class AffineCorrection:
+    """Maps gaze points as points @ matrix.T + offset; same transform interface as PolynomialCalibration."""
+    def __init__(self, matrix=None, offset=(0.0, 0.0)):
+        self.matrix = np.eye(2) if matrix is None else np.asarray(matrix, dtype=np.float64).reshape(2, 2)
+        self.offset = np.asarray(offset, dtype=np.float64)
+
+    def transform(self, points):
+        return np.asarray(points, dtype=np.float64) @ self.matrix.T + self.offset
+
+
+class ShiftedCorrection:
+    """A correction followed by a constant shift, e.g. the offset fitted on top of a model."""
+    def __init__(self, correction, offset):
+        self.correction = correction
+        self.offset = np.asarray(offset, dtype=np.float64)
+
+    def transform(self, points):
+        return self.correction.transform(points) + self.offset
+
+
+# --- OFFSET FITTING ---
+def stream_fixations(file_path, dispersion=0.05, duration_min=0.1):
+    """Fixation centres and durations of a gaze file, detected chunk by chunk with the streaming I-DT."""
+    detector = StreamingIDT(dispersion, duration_min)
+    xs, ys, durations = [], [], []
+    for times, chunk_x, chunk_y, _ in iter_gaze_chunks(file_path):
+        for fixation in detector.push(times, chunk_x, chunk_y):
+            xs.append(fixation['x'])
+            ys.append(fixation['y'])
+            durations.append(fixation['duration'])
+    return np.array(xs), np.array(ys), np.array(durations)
+
+
+def text_line_bands(layout):
+    """Centre y of each text line and the horizontal extent of the text, in gaze units (-1..1, y up)."""
+    boxes = layout['boxes']
+    width, height = layout['screen_width'], layout['screen_height']
+    tops = np.round(boxes[:, 1])
+    centres = np.array([np.mean(boxes[tops == top, 1] + boxes[tops == top, 3] / 2) for top in np.unique(tops)])
+    line_ys = np.sort(1 - centres / height * 2)
+    left = boxes[:, 0].min() / width * 2 - 1
+    right = (boxes[:, 0] + boxes[:, 2]).max() / width * 2 - 1
+    return line_ys, (left, right)
+
+
+def fit_line_offset(fix_y, weights, line_ys, max_shift=0.3, step=0.002):
+    """
+    The vertical shift that best puts the fixations on the text lines: a grid search over
+    +-max_shift of the duration-weighted squared distance to the nearest line (capped at one
+    line spacing, so stray fixations cannot dominate), refined by the mean remaining residual.
+    """
+    spacing = float(np.median(np.diff(line_ys))) if len(line_ys) > 1 else max_shift
+
+    def nearest_line(y):
+        k = np.clip(np.searchsorted(line_ys, y), 1, max(len(line_ys) - 1, 1))
+        below, above = line_ys[k - 1], line_ys[min(k, len(line_ys) - 1)]
+        return np.where(np.abs(y - below) <= np.abs(y - above), below, above)
+
+    shifts = np.arange(-max_shift, max_shift + step / 2, step)
+    costs = [np.sum(weights * np.minimum(np.abs(nearest_line(fix_y + s) - (fix_y + s)), spacing) ** 2)
+             for s in shifts]
+    best = shifts[int(np.argmin(costs))]
+
+    residual = nearest_line(fix_y + best) - (fix_y + best)
+    close = np.abs(residual) < spacing / 2
+    if close.any() and weights[close].sum() > 0:
+        best += np.average(residual[close], weights=weights[close])
+    return float(best)
+
+
+def fit_session_offset(session_dir, correction, file_path):
+    """Fits the y offset that aligns the corrected fixations of a session to its text lines."""
+    layout = load_word_layout(session_dir)
+    if layout is None or not len(layout['boxes']):
+        raise ValueError("no stored text layout to fit the text lines to")
+    line_ys, (left, right) = text_line_bands(layout)
+
+    fix_x, fix_y, durations = stream_fixations(file_path)
+    if not len(fix_x):
+        raise ValueError("no fixations found")
+    # Fixation centres are corrected instead of every sample. That is exact for an affine map
+    # (the map of the mean is the mean of the map) but only approximate for a polynomial model,
+    # with an error of the order of its curvature times the fixation's dispersion (< 0.05)
+    corrected = correction.transform(np.column_stack((fix_x, fix_y)))
+    over_text = (corrected[:, 0] >= left) & (corrected[:, 0] <= right)
+    if not over_text.any():
+        raise ValueError("no fixations over the text")
+    return fit_line_offset(corrected[over_text, 1], durations[over_text], line_ys)
+
+
+# --- REPAIR ---
+def replace_with_backup(file_path, new_path):
+    """
+    Atomically replaces file_path with new_path. The first time, the original is kept
+    as file_path + '.bak' (hard-linked when possible, so it costs no copy).
+    """
+    backup = file_path + BACKUP_SUFFIX
+    if not os.path.exists(backup):
+        try:
+            os.link(file_path, backup)
+        except OSError:
+            shutil.copy2(file_path, backup)
+    os.replace(new_path, file_path)
+    return backup
+
+
+def repair_session(task):
+    """Worker: corrects one session's gaze file. Returns a summary row for it."""
+    session_dir, correction, fit_lines, dry_run, filename = task
+    file_path = os.path.join(session_dir, filename)
+    row = {'session': session_dir}
+    try:
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(f"no {filename}")
+        if fit_lines:
+            dy = fit_session_offset(session_dir, correction, file_path)
+            row['fitted_y_offset'] = dy
+            correction = ShiftedCorrection(correction, (0.0, dy))
+        if dry_run:
+            return dict(row, status='dry run')
+
+        tmp_path = file_path + '.tmp'
+        try:
+            count, rejected = calibrate_gaze_file(correction.transform, file_path, tmp_path)
+            row['backup'] = replace_with_backup(file_path, tmp_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return dict(row, points=count, skipped=rejected, status='repaired')
+    except Exception as e:
+        return dict(row, status=f"failed: {e}")
+
+
+def build_correction(args):
+    if args.model:
+        if args.matrix or args.x_offset or args.y_offset:
+            raise ValueError("--model cannot be combined with --matrix or offsets")
+        return PolynomialCalibration.load(args.model)
+    matrix = None
+    if args.matrix:
+        matrix = [float(v) for v in args.matrix.split(',')]
+        if len(matrix) != 4:
+            raise ValueError("--matrix expects four comma-separated numbers: A,B,C,D for [[A, B], [C, D]]")
+    return AffineCorrection(matrix, (args.x_offset, args.y_offset))
+
+
+def run_repair(session_dirs, correction, fit_lines=False, dry_run=False, jobs=None, filename=GAZE_FILENAME):
+    tasks = [(session_dir, correction, fit_lines, dry_run, filename) for session_dir in session_dirs]
+    jobs = min(jobs or os.cpu_count() or 1, len(tasks))
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            rows = list(pool.map(repair_session, tasks))
+    else:
+        rows = [repair_session(task) for task in tasks]
+
+    for row in rows:
+        details = []
+        if 'fitted_y_offset' in row:
+            details.append(f"fitted y offset {row['fitted_y_offset']:+.4f}")
+        if 'points' in row:
+            details.append(f"{row['points']} points corrected, {row['skipped']} malformed lines skipped")
+        if 'backup' in row:
+            details.append(f"original kept as {os.path.basename(row['backup'])}")
+        print(f"{row['session']}: {row['status']}" + (f" ({'; '.join(details)})" if details else ""))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Correct the calibrated gaze data of recorded sessions")
+    parser.add_argument('sessions', nargs='+', help="session directories to repair")
+    parser.add_argument('--y-offset', type=float, default=0.0, help="added to y (positive moves the dots up)")
+    parser.add_argument('--x-offset', type=float, default=0.0, help="added to x (positive moves the dots right)")
+    parser.add_argument('--matrix', default=None, help="linear part A,B,C,D of the affine map, applied before the offsets")
+    parser.add_argument('--model', default=None, help="polynomial calibration model (JSON) to apply instead")
+    parser.add_argument('--fit-lines', action='store_true',
+                        help="fit an additional y offset that aligns the fixations to the text lines")
+    parser.add_argument('--dry-run', action='store_true', help="report fitted offsets without changing any file")
+    parser.add_argument('--file', default=GAZE_FILENAME, help="gaze file within each session to repair")
+    parser.add_argument('--jobs', type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+    try:
+        correction = build_correction(args)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    rows = run_repair(args.sessions, correction, args.fit_lines, args.dry_run, args.jobs, args.file)
+    return 1 if any(row['status'].startswith('failed') for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,153 +1,77 @@
 import os
-import re
-import numpy as np
-import pandas as pd
-from datetime import datetime
+import sqlite3
 
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QLabel, QPushButton, QMessageBox, QFrame)
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
 from config import app_config
+from analysis_cache import AnalysisCache
+from analysis_records import analysis_record, append_to_index, write_analysis_record
+from plotting import add_scanpath, plot_decimated
+from session_analysis import GazeAnalyzer, write_analysis_results
 
 # --- ANALYSIS LOGIC ---
-class GazeAnalyzer:
-    def __init__(self, file_path):
-        self.file_path = file_path
-        self.raw_data = self._load_data()
-        self.fixations = pd.DataFrame()
-        self.saccades = pd.DataFrame()
-
-    def _load_data(self):
-        data = []
-        pattern = re.compile(r'\[(.*?)\] Gaze point: \[(.*?), (.*?)\]')
+def save_analysis_record(analyzer, results_index=None):
+    """Writes the structured record of an analysis next to its data and appends it to the index."""
+    record = analysis_record(analyzer.result, analyzer.file_path, analyzer.analysis_parameters())
+    write_analysis_record(record, os.path.dirname(analyzer.file_path))
+    if results_index:
         try:
-            with open(self.file_path, 'r') as f:
-                for line in f:
-                    match = pattern.search(line)
-                    if match:
-                        ts_str, x_str, y_str = match.groups()
-                        ts = datetime.strptime(ts_str, "%Y-%m-%d %H:%M:%S.%f").timestamp()
-                        data.append({'time': ts, 'x': float(x_str), 'y': float(y_str)})
-            df = pd.DataFrame(data)
-            if not df.empty:
-                df['time'] = df['time'] - df.iloc[0]['time']
-            return df
-        except Exception:
-            return pd.DataFrame()
-
-    def run_analysis(self):
-        if self.raw_data.empty: return None
-        self._detect_fixations()
-        self._detect_saccades()
-        return self._calculate_metrics()
-
-    def _detect_fixations(self, dispersion=0.05, duration_min=0.1):
-        points = self.raw_data.to_dict('records')
-        fixations = []
-        i = 0
-        while i < len(points):
-            j = i + 1
-            while j < len(points):
-                dt = points[j]['time'] - points[i]['time']
-                window = points[i:j+1]
-                dx = max(p['x'] for p in window) - min(p['x'] for p in window)
-                dy = max(p['y'] for p in window) - min(p['y'] for p in window)
-                if (dx + dy) > dispersion:
-                    if dt >= duration_min:
-                        fixations.append({
-                            'start': points[i]['time'],
-                            'end': points[j-1]['time'],
-                            'dur': dt,
-                            'x': np.mean([p['x'] for p in window]),
-                            'y': np.mean([p['y'] for p in window])
-                        })
-                        i = j
-                    else:
-                        i += 1
-                    break
-                else:
-                    j += 1
-            else:
-                break
-        self.fixations = pd.DataFrame(fixations)
-
-    def _detect_saccades(self):
-        if self.fixations.empty: return
-        saccades = []
-        for i in range(1, len(self.fixations)):
-            prev, curr = self.fixations.iloc[i-1], self.fixations.iloc[i]
-            dx = curr['x'] - prev['x']
-            dy = curr['y'] - prev['y']
-            
-            # Logic for saccade type
-            sType = 'noise'
-            if abs(dy) < 0.15:
-                if dx > 0.02: sType = 'forward'
-                elif dx < -0.02: sType = 'regression'
-            elif dy < -0.2: sType = 'line_return' 
-            
-            saccades.append({'type': sType, 'dx': dx, 'dy': dy, 'dist': np.sqrt(dx**2+dy**2)})
-        self.saccades = pd.DataFrame(saccades)
+            append_to_index(record, results_index)
+        except sqlite3.Error as e:
+            print(f"Could not update the results index: {e}")
+    return record
 
-    def _calculate_metrics(self):
-        if self.fixations.empty or self.saccades.empty: return None
-        
-        avg_fix = self.fixations['dur'].mean()
-        counts = self.saccades['type'].value_counts()
-        
-        # Safe division
-        total_reading_moves = counts.get('forward', 0) + counts.get('regression', 0)
-        reg_rate = counts.get('regression', 0) / (total_reading_moves + 1e-6)
-        
-        # Std Dev of saccades
-        fwd_saccades = self.saccades[self.saccades['type']=='forward']
-        saccade_std = fwd_saccades['dist'].std() if not fwd_saccades.empty else 0
-        
-        # --- TUNED SCORING FORMULA ---
-        score = (15 * avg_fix) + (20 * reg_rate) + (10 * saccade_std)
-        
-        # --- INTERPRETATION RANGES ---
-        
-        # 1. Regression Rate Logic
-        if reg_rate < 0.15:
-            reg_status = "Normal Range"
-        elif reg_rate < 0.25:
-            reg_status = "Moderate (Monitor)"
-        else:
-            reg_status = "High (Difficulty Indicator)"
-        
-        # Adding the reference line
-        reg_desc = f"{reg_status}\n[Ref: Normal < 15% | High > 25%]"
-
-        # 2. Fixation Logic
-        if avg_fix < 0.22:
-            fix_status = "Normal (Fast Processing)"
-        elif avg_fix < 0.32:
-            fix_status = "Moderate (Slower Decoding)"
-        else:
-            fix_status = "High (Processing Delay)"
+class AnalysisCancelled(Exception):
+    pass
 
-        fix_desc = f"{fix_status}\n[Ref: Normal < 0.22s | High > 0.32s]"
+# Workers that are still running after their window dropped them; kept alive until they finish
+_live_workers = set()
 
-        # 3. Score Logic
-        if score < 5.0:
-            score_status = "Low Risk (Fluent)"
-        elif score < 7.0:
-            score_status = "Moderate Risk"
-        else:
-            score_status = "High Risk"
+class AnalysisWorker(QThread):
+    """ Runs a session analysis off the GUI thread. """
+    progress = pyqtSignal(int, str)
+    metrics_ready = pyqtSignal(object)    # metrics dict
+    analysis_done = pyqtSignal(object)    # GazeAnalyzer, for the graphs
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_path, cache=None, results_index=None):
+        super().__init__()
+        self.file_path = file_path
+        self.cache = cache
+        self.results_index = results_index  # SQLite index the structured record is appended to
+        self._cancelled = False
+        _live_workers.add(self)
+        self.finished.connect(lambda: _live_workers.discard(self))
+
+    def cancel(self):
+        self._cancelled = True
 
-        score_desc = f"{score_status}\n[Ref: Low < 5.0 | High > 7.0]"
+    def _report(self, percent, stage):
+        if self._cancelled:
+            raise AnalysisCancelled()
+        self.progress.emit(percent, stage)
 
-        return {
-            "Average Fixation": (avg_fix, "s", fix_desc),
-            "Regression Rate": (reg_rate, "%", reg_desc),
-            "Dyslexia Risk Score": (score, "", score_desc)
-        }
+    def run(self):
+        try:
+            self._report(5, "Loading gaze data")
+            analyzer = GazeAnalyzer(self.file_path)
+            metrics = analyzer.run_analysis(cache=self.cache, progress=self._report)
+            self._report(100, "Done")
+            self.metrics_ready.emit(metrics)
+            if metrics:
+                self.analysis_done.emit(analyzer)
+            # The record is written after the cards are shown, and never for a cancelled run
+            if analyzer.result is not None and not self._cancelled:
+                save_analysis_record(analyzer, self.results_index)
+        except AnalysisCancelled:
+            pass
+        except Exception as e:
+            self.failed.emit(str(e))
 
 # --- RESULTS WINDOW UI ---
 class ResultsWindow(QMainWindow):
@@ -155,6 +79,8 @@ class ResultsWindow(QMainWindow):
         super().__init__(parent)
         self.setWindowTitle("Analysis Results")
         self.resize(1400, 1000) # Start bigger
+        self.worker = None
+        self.analysis_directory = None  # Session directory of the current worker's analysis
         self.initUI()
         self.analyze_current_session()
 
@@ -169,6 +95,16 @@ class ResultsWindow(QMainWindow):
         self.title_label.setFont(QFont("Arial", 16, QFont.Bold))
         header.addWidget(self.title_label)
         header.addStretch()
+
+        self.progress_label = QLabel("")
+        self.progress_label.setFont(QFont("Arial", 10))
+        header.addWidget(self.progress_label)
+
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.setFixedSize(100, 40)
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel_analysis)
+        header.addWidget(self.cancel_btn)
         
         self.close_btn = QPushButton("Close")
         self.close_btn.setFixedSize(100, 40)
@@ -205,15 +141,61 @@ class ResultsWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "No calibrated data found in this session.")
             return
 
-        analyzer = GazeAnalyzer(file_path)
-        metrics = analyzer.run_analysis()
+        # A new analysis replaces any running one instead of queuing behind it
+        self.cancel_analysis()
+        self.title_label.setText("Session Analysis Results")
+        self.analysis_directory = directory
+        self.worker = AnalysisWorker(file_path, AnalysisCache(app_config.cache_directory), app_config.results_index)
+        for signal, slot in self._worker_slots():
+            signal.connect(slot)
+        self.cancel_btn.setEnabled(True)
+        self.worker.start()
+
+    def _worker_slots(self):
+        # This window's connections to the current worker; the worker keeps its own
+        return [(self.worker.progress, self.on_progress),
+                (self.worker.metrics_ready, self.on_metrics_ready),
+                (self.worker.analysis_done, self.on_analysis_done),
+                (self.worker.failed, self.on_analysis_failed),
+                (self.worker.finished, self.on_analysis_finished)]
+
+    def cancel_analysis(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            # Results of a cancelled run must never reach this window. Only this window's
+            # slots are disconnected: the worker must still drop itself from _live_workers
+            for signal, slot in self._worker_slots():
+                signal.disconnect(slot)
+            if self.worker.isRunning():
+                self.progress_label.setText("Analysis cancelled")
+            self.worker = None
+        self.cancel_btn.setEnabled(False)
 
+    def on_progress(self, percent, stage):
+        self.progress_label.setText(f"{stage}... {percent}%")
+
+    def on_metrics_ready(self, metrics):
         if metrics:
             self.display_metrics(metrics)
-            self.draw_graphs(analyzer)
-            self.auto_save_results(metrics, directory)
+            self.auto_save_results(metrics, self.analysis_directory)
         else:
-             self.title_label.setText("Not enough data to analyze")
+            self.title_label.setText("Not enough data to analyze")
+
+    def on_analysis_done(self, analyzer):
+        # Let the metric cards paint before the slower matplotlib drawing
+        QTimer.singleShot(0, lambda: self.draw_graphs(analyzer))
+        self.progress_label.setText("")
+
+    def on_analysis_failed(self, message):
+        self.progress_label.setText("")
+        self.title_label.setText(f"Analysis failed: {message}")
+
+    def on_analysis_finished(self):
+        self.cancel_btn.setEnabled(False)
+
+    def closeEvent(self, event):
+        self.cancel_analysis()
+        super().closeEvent(event)
 
     def display_metrics(self, metrics):
         # Clear existing items safely
@@ -269,14 +251,12 @@ class ResultsWindow(QMainWindow):
         
         if not analyzer.fixations.empty:
             ax1.scatter(analyzer.fixations['x'], analyzer.fixations['y'], 
-                       s=analyzer.fixations['dur']*800, alpha=0.4, c='blue', label='Fixation (Size=Duration)')
+                       s=analyzer.fixations['duration']*800, alpha=0.4, c='blue', label='Fixation (Size=Duration)')
             
-            for i, row in analyzer.saccades.iterrows():
-                start = analyzer.fixations.iloc[i]
-                end = analyzer.fixations.iloc[i+1]
-                color = 'red' if row['type'] == 'regression' else 'green'
-                alpha = 0.5 if row['type'] == 'regression' else 0.15
-                ax1.plot([start['x'], end['x']], [start['y'], end['y']], color=color, alpha=alpha, linewidth=1)
+            # One collection per saccade type instead of one line per saccade
+            add_scanpath(ax1, analyzer.fixations['x'], analyzer.fixations['y'], analyzer.saccades['type'],
+                         {'regression': dict(color='red', alpha=0.5, linewidth=1)},
+                         default=dict(color='green', alpha=0.15, linewidth=1))
             
             ax1.legend(loc='upper right', fontsize='small')
 
@@ -286,9 +266,10 @@ class ResultsWindow(QMainWindow):
         ax2.set_xlabel("Time (s)")
         ax2.set_ylabel("Horizontal Position (Left → Right)")
         
-        ax2.plot(analyzer.raw_data['time'], analyzer.raw_data['x'], color='gray', alpha=0.3, label='Raw Gaze')
+        # Min/max decimated to the axes' pixel width; re-decimated on zoom/pan
+        plot_decimated(ax2, analyzer.raw_data['time'], analyzer.raw_data['x'], color='gray', alpha=0.3, label='Raw Gaze')
         if not analyzer.fixations.empty:
-            ax2.plot(analyzer.fixations['end'], analyzer.fixations['x'], 'o-', color='navy', markersize=3, linewidth=1, label='Fixations')
+            ax2.plot(analyzer.fixations['end_time'], analyzer.fixations['x'], 'o-', color='navy', markersize=3, linewidth=1, label='Fixations')
         
         ax2.legend(loc='upper left')
         
@@ -299,25 +280,4 @@ class ResultsWindow(QMainWindow):
         self.canvas.draw()
 
     def auto_save_results(self, metrics, directory):
-        file_path = os.path.join(directory, "analysis_results.txt")
-        try:
-            with open(file_path, "w") as f:
-                f.write("=== DYSLEXIA SCREENING ANALYSIS ===\n")
-                f.write(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write("=" * 35 + "\n\n")
-                
-                for k, (val, unit, desc) in metrics.items():
-                    if unit == "%":
-                        val_str = f"{val*100:.2f}%"
-                    else:
-                        val_str = f"{val:.4f} {unit}"
-                        
-                    f.write(f"{k}: {val_str}\n")
-                    f.write(f"   -> {desc.replace(chr(10), ' | ')}\n\n")
-                
-                f.write("=" * 35 + "\n")
-                f.write("NOTE: This is a behavioral screening tool, not a medical diagnosis.\n")
-            
-            print(f"Results automatically saved to: {file_path}")
-        except Exception as e:
-            print(f"Failed to autosave: {e}")
\ No newline at end of file
+        write_analysis_results(metrics, directory)
@@ -0,0 +1,78 @@
+# saccades.py
+import numpy as np
+
+# Classification thresholds (normalized gaze coordinates)
+SAME_LINE_DY = 0.15      # |dy| below this stays on the current line
+MIN_HORIZONTAL_DX = 0.02  # smaller horizontal moves are noise
+LINE_RETURN_DY = -0.2    # a drop below this is a move to the next line
+
+
+def classify_saccades(dx, dy):
+    """Labels each movement as forward, regression, line_return or noise."""
+    dx = np.asarray(dx, dtype=float)
+    dy = np.asarray(dy, dtype=float)
+    same_line = np.abs(dy) < SAME_LINE_DY
+    return np.select(
+        [same_line & (dx > MIN_HORIZONTAL_DX),
+         same_line & (dx < -MIN_HORIZONTAL_DX),
+         ~same_line & (dy < LINE_RETURN_DY)],
+        ['forward', 'regression', 'line_return'],
+        default='noise').astype(object)
+
+
+def detect_saccades(fix_x, fix_y, fix_start=None, fix_end=None):
+    """
+    Computes the movements between consecutive fixations as arrays:
+    dx, dy, distance, type and, when fixation times are given, duration
+    (next start minus previous end).
+    """
+    fix_x = np.asarray(fix_x, dtype=float)
+    fix_y = np.asarray(fix_y, dtype=float)
+    dx = np.diff(fix_x)
+    dy = np.diff(fix_y)
+    saccades = {
+        'dx': dx,
+        'dy': dy,
+        'distance': np.sqrt(dx**2 + dy**2),
+        'type': classify_saccades(dx, dy)
+    }
+    if fix_start is not None and fix_end is not None:
+        saccades['duration'] = np.asarray(fix_start, dtype=float)[1:] - np.asarray(fix_end, dtype=float)[:-1]
+    return saccades
+
+
+def _sample_std(values):
+    # Matches pandas' Series.std(): ddof=1, NaN for a single value
+    if len(values) < 2:
+        return np.nan
+    return np.std(values, ddof=1)
+
+
+def saccade_metrics(types, distance, dy, duration=None):
+    """
+    Reading metrics over the saccade arrays:
+    forward/regression counts, regression rate, forward saccade length variability,
+    line noise (mean |dy| of reading moves) and speed instability (std of
+    forward distance / duration). Empty selections give 0.
+    """
+    types = np.asarray(types)
+    distance = np.asarray(distance, dtype=float)
+    dy = np.asarray(dy, dtype=float)
+    forward = types == 'forward'
+    regression = types == 'regression'
+    n_fwd = int(forward.sum())
+    n_reg = int(regression.sum())
+    reading = forward | regression
+
+    metrics = {
+        'n_forward': n_fwd,
+        'n_regression': n_reg,
+        'regression_rate': n_reg / (n_reg + n_fwd) if (n_reg + n_fwd) > 0 else 0,
+        'saccade_length_std': _sample_std(distance[forward]) if n_fwd else 0,
+        'line_noise': np.abs(dy[reading]).mean() if reading.any() else 0,
+        'speed_instability': 0
+    }
+    if duration is not None and n_fwd:
+        speeds = distance[forward] / (np.asarray(duration, dtype=float)[forward] + 0.001)  # Avoid div/0
+        metrics['speed_instability'] = _sample_std(speeds)
+    return metrics
@@ -0,0 +1,23 @@
+# screen_coords.py
+"""Conversion of normalized gaze coordinates (-1..1, y up) to screen pixels, without Qt."""
+import numpy as np
+
+
+def normalize_gaze_to_screen(gaze_point, screen_width, screen_height):
+    x, y = gaze_point
+    x_scale = max(abs(x), 1)
+    y_scale = max(abs(y), 1)
+    screen_x = int(((x / x_scale) + 1) / 2 * screen_width)
+    screen_y = int((1 - (y / y_scale)) / 2 * screen_height)
+    return screen_x, screen_y
+
+
+def normalize_gaze_array(xs, ys, screen_width, screen_height):
+    """Vectorized normalize_gaze_to_screen for arrays of gaze coordinates."""
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    x_scale = np.maximum(np.abs(xs), 1)
+    y_scale = np.maximum(np.abs(ys), 1)
+    screen_x = np.trunc(((xs / x_scale) + 1) / 2 * screen_width).astype(int)
+    screen_y = np.trunc((1 - (ys / y_scale)) / 2 * screen_height).astype(int)
+    return screen_x, screen_y
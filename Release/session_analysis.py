@@ -0,0 +1,81 @@
+# session_analysis.py
+"""
+Analysis of one recorded session, shared by the results window and batch_analysis.py:
+GazeAnalyzer runs the analysis pipeline on a gaze file and write_analysis_results
+writes the session's analysis_results.txt. Nothing here depends on Qt.
+"""
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from analysis_engine import AnalysisPipeline, IDTFixations, ScreeningReport, fixation_stage
+
+
+def session_fixation_stage(method='idt', dispersion=0.05, duration_min=0.1):
+    """
+    The fixation definition of the screening analysis, shared by everything that reports
+    on a session (results window, batch_analysis.py, word_metrics.py) so their fixations
+    agree: I-DT fixations include the sample that broke the dispersion window.
+    """
+    if method == 'idt':
+        return IDTFixations(dispersion, duration_min, include_break_sample=True)
+    return fixation_stage(method, duration_min=duration_min)
+
+
+class GazeAnalyzer:
+    """ One session's analysis through the shared pipeline (see analysis_engine), as pandas tables. """
+    def __init__(self, file_path, dispersion=0.05, duration_min=0.1, score_weights=(15, 20, 10),
+                 fixation_method='idt', pipeline=None):
+        self.file_path = file_path
+        w_fix, w_reg, w_std = score_weights  # avg fixation, regression rate, saccade std
+        self.pipeline = pipeline or AnalysisPipeline(
+            fixations=session_fixation_stage(fixation_method, dispersion, duration_min),
+            interpretation=ScreeningReport({'avg_fixation_duration': w_fix, 'regression_rate': w_reg,
+                                            'saccade_length_std': w_std}))
+        self.samples = self.pipeline.load(file_path)
+        self.raw_data = pd.DataFrame(self.samples)
+        self.fixations = pd.DataFrame()
+        self.saccades = pd.DataFrame()
+        self.result = None
+
+    def analysis_parameters(self):
+        """Everything besides the input data that the results depend on (used as cache key)."""
+        return self.pipeline.parameters()
+
+    def run_analysis(self, cache=None, progress=None):
+        """
+        Runs fixation, saccade and metric detection. `progress(percent, stage)` is
+        called before each stage; it may raise to abort the analysis.
+        """
+        if self.raw_data.empty: return None
+        self.result = self.pipeline.run(self.file_path, samples=self.samples, cache=cache, progress=progress)
+        self.fixations = self.result.fixation_frame()
+        self.saccades = self.result.saccade_frame()
+        return self.result.report
+
+
+def write_analysis_results(metrics, directory):
+    """Writes the human-readable analysis_results.txt for a session."""
+    file_path = os.path.join(directory, "analysis_results.txt")
+    try:
+        with open(file_path, "w") as f:
+            f.write("=== DYSLEXIA SCREENING ANALYSIS ===\n")
+            f.write(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write("=" * 35 + "\n\n")
+            
+            for k, (val, unit, desc) in metrics.items():
+                if unit == "%":
+                    val_str = f"{val*100:.2f}%"
+                else:
+                    val_str = f"{val:.4f} {unit}"
+                    
+                f.write(f"{k}: {val_str}\n")
+                f.write(f"   -> {desc.replace(chr(10), ' | ')}\n\n")
+            
+            f.write("=" * 35 + "\n")
+            f.write("NOTE: This is a behavioral screening tool, not a medical diagnosis.\n")
+        
+        print(f"Results automatically saved to: {file_path}")
+    except Exception as e:
+        print(f"Failed to autosave: {e}")
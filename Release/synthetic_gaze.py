@@ -0,0 +1,203 @@
+# synthetic_gaze.py
+"""
+Synthetic gaze recordings of someone reading a text layout, for benchmarks and
+for testing without an eye tracker. The reader fixates words (landing a little
+left of their centre), mostly moves forward one word, sometimes skips a word or
+regresses one to three words, and returns to the next line at the end of each
+line, starting over at the top after the last one. Samples carry fixation
+jitter, and the recording has short tracking dropouts (time gaps, as the
+recorder writes nothing while the tracker has lost the eyes).
+
+Usage: python synthetic_gaze.py OUTPUT_FILE [--samples N] [--rate HZ] [--layout SESSION_DIR] [--seed S]
+"""
+import argparse
+import sys
+from datetime import datetime
+
+import numpy as np
+
+from gaze_io import EPOCH, write_gaze_text
+from text_layout import load_word_layout
+
+RECORDING_START = datetime(2026, 1, 1, 20, 13, 49)
+SCREEN_DEGREES = 42.0  # Visual angle spanned by the screen width (2 gaze units)
+
+
+def synthetic_layout(screen_width=1920, screen_height=1080, n_lines=8, words_per_line=10, seed=0):
+    """A word layout shaped like the one setupLabels builds, without Qt (same dict as load_word_layout)."""
+    rng = np.random.default_rng(seed)
+    line_height = screen_height * 0.045
+    line_step = line_height * 1.9
+    x_start = screen_width * 0.1
+    y = screen_height * 0.08 + (screen_height * 0.77 - n_lines * line_step) / 2
+    boxes, identifiers, words = [], [], []
+    for _ in range(n_lines):
+        widths = rng.uniform(0.5, 1.5, words_per_line)
+        widths *= screen_width * 0.8 / widths.sum()
+        x = x_start
+        for width in widths:
+            boxes.append((x, y, width * 0.85, line_height))  # The label excludes the following space
+            identifiers.append(f"{int(y)}-{x}")
+            words.append('word')
+            x += width
+        y += line_step
+    return {'screen_width': screen_width, 'screen_height': screen_height, 'dpi_scale': 1.0, 'font': None,
+            'line_spacing': 1.9, 'identifiers': identifiers, 'words': words, 'boxes': np.array(boxes, dtype=np.float64)}
+
+
+def _text_lines(boxes):
+    # Word indices per text line, top to bottom and left to right
+    tops = np.round(boxes[:, 1]).astype(np.int64)
+    lines = []
+    for top in np.unique(tops):
+        members = np.flatnonzero(tops == top)
+        lines.append(members[np.argsort(boxes[members, 0], kind='stable')])
+    return lines
+
+
+class ReadingSimulator:
+    """
+    Generates a reading scanpath over a layout block by block, so recordings of any
+    length can be produced in constant memory. Coordinates are gaze units (-1..1,
+    y up) as the recorder writes them; times are seconds as in gaze_io.
+    """
+    def __init__(self, layout, rate_hz=90, seed=0, noise=0.005, regression_rate=0.12, skip_rate=0.1,
+                 dropouts_per_minute=6.0, start=RECORDING_START):
+        self.rate_hz = rate_hz
+        self.noise = noise
+        self.regression_rate = regression_rate
+        self.skip_rate = skip_rate
+        self.dropouts_per_minute = dropouts_per_minute
+        self.rng = np.random.default_rng(seed)
+        self.width, self.height = layout['screen_width'], layout['screen_height']
+        self.boxes = np.asarray(layout['boxes'], dtype=np.float64)
+        self.lines = _text_lines(self.boxes)
+        self.start_time = (start - EPOCH).total_seconds()
+        self._line, self._word = 0, 0
+        self._clock = 0                      # Sample slots used so far, including dropouts
+        self._pending = self._next_fixation()  # Target of the next fixation, not emitted yet
+
+    def _next_fixation(self):
+        rng = self.rng
+        x, y, w, h = self.boxes[self.lines[self._line][self._word]]
+        landing_x = x + w * np.clip(rng.normal(0.4, 0.15), 0.05, 0.95)
+        landing_y = y + h * (0.5 + rng.normal(0, 0.15))
+        duration = np.clip(rng.lognormal(np.log(0.22), 0.35), 0.08, 0.8)
+
+        # Where the eyes go next
+        line = self.lines[self._line]
+        r = rng.random()
+        if self._word == len(line) - 1:
+            self._line = (self._line + 1) % len(self.lines)
+            self._word = 0
+        elif r < self.regression_rate and self._word > 0:
+            self._word -= int(rng.integers(1, min(3, self._word) + 1))
+        elif r < self.regression_rate + self.skip_rate:
+            self._word = min(self._word + 2, len(line) - 1)
+        else:
+            self._word += 1
+
+        gaze_x = landing_x / self.width * 2 - 1
+        gaze_y = 1 - landing_y / self.height * 2
+        return gaze_x, gaze_y, max(int(round(duration * self.rate_hz)), 1)
+
+    def next_block(self, min_samples):
+        """
+        Returns (times, xs, ys, is_fixation) for the next whole fixations and saccades,
+        at least min_samples sample slots long (fewer samples if dropouts fall in it).
+        """
+        rng = self.rng
+        targets = [self._pending]
+        slots = 0
+        while slots < min_samples:
+            targets.append(self._next_fixation())
+            slots += targets[-2][2]
+        self._pending = targets.pop()
+        next_targets = targets[1:] + [self._pending]
+
+        fx = np.array([t[0] for t in targets])
+        fy = np.array([t[1] for t in targets])
+        fix_len = np.array([t[2] for t in targets])
+        nx = np.array([t[0] for t in next_targets])
+        ny = np.array([t[1] for t in next_targets])
+        # Saccade duration grows with amplitude: about 20 ms + 2.2 ms per degree
+        amplitude = np.hypot(nx - fx, ny - fy) / 2 * SCREEN_DEGREES
+        sac_len = np.maximum(np.round((0.020 + 0.0022 * amplitude) * self.rate_hz).astype(np.int64), 1)
+
+        # Expand events into samples: each event is its fixation followed by the saccade to the next one
+        seg_len = fix_len + sac_len
+        event = np.repeat(np.arange(len(targets)), seg_len)
+        pos = np.arange(len(event)) - np.repeat(np.cumsum(seg_len) - seg_len, seg_len)
+        is_fixation = pos < fix_len[event]
+        progress = np.where(is_fixation, 0.0, (pos - fix_len[event] + 1) / (sac_len[event] + 1))
+        profile = 0.5 - 0.5 * np.cos(np.pi * progress)  # Smooth acceleration and deceleration
+        xs = fx[event] + (nx[event] - fx[event]) * profile
+        ys = fy[event] + (ny[event] - fy[event]) * profile
+        jitter = np.where(is_fixation, self.noise, self.noise / 2)
+        xs += rng.normal(0, 1, len(xs)) * jitter
+        ys += rng.normal(0, 1, len(ys)) * jitter
+
+        slot = self._clock + np.arange(len(event))
+        times = self.start_time + (slot + rng.uniform(0, 0.03, len(slot))) / self.rate_hz
+        self._clock += len(event)
+
+        keep = np.ones(len(event), dtype=bool)
+        n_dropouts = rng.poisson(self.dropouts_per_minute * len(event) / self.rate_hz / 60)
+        for start in rng.integers(0, len(event), n_dropouts):
+            keep[start:start + int(rng.uniform(0.05, 0.3) * self.rate_hz)] = False
+        return times[keep], xs[keep], ys[keep], is_fixation[keep]
+
+    def samples(self, n_samples, block_size=1 << 20):
+        """Yields blocks of (times, xs, ys, is_fixation) totalling exactly n_samples."""
+        remaining = n_samples
+        while remaining > 0:
+            block = self.next_block(min(block_size, remaining))
+            block = tuple(column[:remaining] for column in block)
+            remaining -= len(block[0])
+            yield block
+
+
+def reading_scanpath(layout, n_samples, rate_hz=90, seed=0, **options):
+    """A whole synthetic recording as arrays: times, xs, ys and the true fixation label of each sample."""
+    blocks = list(ReadingSimulator(layout, rate_hz, seed, **options).samples(n_samples))
+    if not blocks:
+        return np.empty(0), np.empty(0), np.empty(0), np.empty(0, dtype=bool)
+    return tuple(np.concatenate(column) for column in zip(*blocks))
+
+
+def write_recording(file_path, layout, n_samples, rate_hz=90, seed=0, **options):
+    """Writes a synthetic recording in the recorder's exact text format, in constant memory."""
+    with open(file_path, 'w') as f:
+        for times, xs, ys, _ in ReadingSimulator(layout, rate_hz, seed, **options).samples(n_samples):
+            write_gaze_text(f, times, xs, ys)
+
+
+def synthetic_reading_samples(n_samples, rate_hz=90, noise=0.005, seed=0):
+    """
+    Reading gaze over synthetic_layout() with times in seconds from the first slot.
+    Returns times, xs, ys and the true fixation label of each sample.
+    """
+    times, xs, ys, labels = reading_scanpath(synthetic_layout(), n_samples, rate_hz, seed, noise=noise)
+    return times - (RECORDING_START - EPOCH).total_seconds(), xs, ys, labels
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic gaze recording of someone reading")
+    parser.add_argument('output_file')
+    parser.add_argument('--samples', type=int, default=54_000, help="number of gaze samples")
+    parser.add_argument('--rate', type=float, default=90.0, help="samples per second")
+    parser.add_argument('--layout', default=None, help="session directory whose stored text layout to read over")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    layout = load_word_layout(args.layout) if args.layout else synthetic_layout()
+    if layout is None:
+        print(f"No word layout in {args.layout}")
+        return 1
+    write_recording(args.output_file, layout, args.samples, args.rate, args.seed)
+    print(f"Wrote {args.samples} samples to {args.output_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+# conftest.py
+import os
+import sys
+
+import pytest
+
+# The modules live side by side in Release/ and import each other by plain name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def make_session(tmp_path):
+    """Creates <tmp>/<user>_data/<session> with a synthetic recording and its stored text layout."""
+    from synthetic_gaze import synthetic_layout, write_recording
+    from text_layout import save_word_layout
+
+    def make(user='alice', session='session1', n_samples=3000, seed=0):
+        session_dir = tmp_path / f'{user}_data' / session
+        session_dir.mkdir(parents=True)
+        layout = synthetic_layout()
+        save_word_layout(str(session_dir), layout['screen_width'], layout['screen_height'],
+                         layout['identifiers'], layout['words'], layout['boxes'])
+        write_recording(str(session_dir / 'gazeData_calibrated.txt'), layout, n_samples, seed=seed)
+        return session_dir
+    return make
@@ -0,0 +1,63 @@
+# test_analysis_records.py
+import json
+
+import numpy as np
+
+from analysis_records import RECORD_FILENAME, analysis_record, append_to_index, load_index, write_analysis_record
+from session_analysis import GazeAnalyzer
+from synthetic_gaze import synthetic_layout, write_recording
+
+
+def analyzed_session(data_dir, user='alice', session='session1', n_samples=3000):
+    session_dir = data_dir / f'{user}_data' / session
+    session_dir.mkdir(parents=True)
+    file_path = str(session_dir / 'gazeData_calibrated.txt')
+    write_recording(file_path, synthetic_layout(), n_samples)
+    analyzer = GazeAnalyzer(file_path)
+    analyzer.run_analysis()
+    return analyzer
+
+
+def test_nan_metrics_are_written_as_null(tmp_path):
+    analyzer = analyzed_session(tmp_path)
+    analyzer.result.metrics['saccade_length_std'] = np.float64(np.nan)
+    record = analysis_record(analyzer.result, analyzer.file_path, analyzer.analysis_parameters())
+    assert record['metrics']['saccade_length_std'] is None
+
+    write_analysis_record(record, str(tmp_path))
+    with open(tmp_path / RECORD_FILENAME) as f:
+        assert json.load(f)['metrics']['saccade_length_std'] is None
+    index_path = str(tmp_path / 'index.sqlite')
+    append_to_index(record, index_path)
+    assert load_index(index_path)['saccade_length_std'].isna().all()
+
+
+def test_load_index_has_one_column_per_metric(tmp_path):
+    index_path = str(tmp_path / 'index.sqlite')
+    for user in ('alice', 'bob'):
+        analyzer = analyzed_session(tmp_path, user)
+        record = analysis_record(analyzer.result, analyzer.file_path, analyzer.analysis_parameters())
+        append_to_index(record, index_path)
+
+    table = load_index(index_path)
+    assert table.columns.is_unique
+    assert sorted(table['user']) == ['alice', 'bob']
+    assert 'n_fixations' in table and (table['n_fixations'] > 0).all()
+    assert 'avg_fixation_duration' in table
+
+    only = load_index(index_path, metrics=['n_fixations'])
+    assert only.columns.is_unique and 'avg_fixation_duration' not in only
+
+
+def test_reanalysis_of_the_same_input_replaces_its_row(tmp_path):
+    index_path = str(tmp_path / 'index.sqlite')
+    analyzer = analyzed_session(tmp_path)
+    record = analysis_record(analyzer.result, analyzer.file_path, analyzer.analysis_parameters())
+    append_to_index(record, index_path)
+    append_to_index(dict(record, from_cache=True), index_path)  # e.g. reopening the results window
+    assert len(load_index(index_path, latest=False)) == 1
+
+    other = GazeAnalyzer(analyzer.file_path, fixation_method='ivt')
+    other.run_analysis()
+    append_to_index(analysis_record(other.result, other.file_path, other.analysis_parameters()), index_path)
+    assert sorted(load_index(index_path, latest=False)['fixation_method']) == ['IDTFixations', 'IVTFixations']
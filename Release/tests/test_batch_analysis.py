@@ -0,0 +1,32 @@
+# test_batch_analysis.py
+import pandas as pd
+
+from analysis_records import INDEX_FILENAME, RECORD_FILENAME, load_index
+from batch_analysis import analyze_session, run_batch
+from word_metrics import WORD_METRICS_FILENAME
+
+
+def test_run_batch_writes_every_output(make_session, tmp_path):
+    first = make_session(session='session1', seed=0)
+    second = make_session(user='bob', session='session1', seed=1)
+    table = run_batch(str(tmp_path), jobs=2)
+
+    assert sorted(table['user']) == ['alice', 'bob']
+    assert (table['status'] == 'analyzed').all()
+    for session_dir in (first, second):
+        assert (session_dir / 'analysis_results.txt').exists()
+        assert (session_dir / RECORD_FILENAME).exists()
+        words = pd.read_csv(session_dir / WORD_METRICS_FILENAME)
+        assert words['n_fixations'].sum() > 0
+    assert len(pd.read_csv(tmp_path / 'analysis_summary.csv')) == 2
+    assert len(load_index(str(tmp_path / INDEX_FILENAME))) == 2
+
+    again = run_batch(str(tmp_path), jobs=2)
+    assert (again['status'] == 'unchanged').all()
+
+
+def test_failed_session_is_reported_as_its_row(tmp_path):
+    session_dir = tmp_path / 'alice_data' / 'session1'
+    session_dir.mkdir(parents=True)
+    row = analyze_session(('alice', 'session1', str(session_dir), False, 'idt'))
+    assert row['user'] == 'alice' and row['status'].startswith('failed')
@@ -0,0 +1,21 @@
+# test_calibration_model.py
+import numpy as np
+
+from calibration_model import calibrate_gaze_file
+
+
+def test_calibrate_gaze_file_keeps_prefix_and_skips_malformed(tmp_path):
+    original = tmp_path / 'gazeData.txt'
+    original.write_text(
+        "[2024-01-01 10:00:00.000000] Gaze point: [0.1, 0.2]\n"
+        "[2024-01-01 10:00:00.011111] Gaze point: [oops, 0.2]\n"
+        "Recording started\n"
+        "[2024-01-01 10:00:00.022222] Gaze point: [-0.5, 1e-1]\n")
+    transformed = tmp_path / 'gazeData_calibrated.txt'
+    count, rejected = calibrate_gaze_file(lambda points: points * 2 + 1, str(original), str(transformed),
+                                          chunk_bytes=64)
+    assert (count, rejected) == (2, 1)
+    lines = transformed.read_text().splitlines()
+    assert lines[0].startswith("[2024-01-01 10:00:00.000000] Gaze point: [")
+    values = [[float(v) for v in line.split('[')[-1].rstrip(']').split(',')] for line in lines]
+    np.testing.assert_allclose(values, [[1.2, 1.4], [0.0, 1.2]])
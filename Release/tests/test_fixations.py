@@ -0,0 +1,90 @@
+# test_fixations.py
+import numpy as np
+import pytest
+
+from fixations import StreamingIDT, detect_fixations_idt
+
+
+def reference_idt(times, xs, ys, dispersion=0.05, duration_min=0.1):
+    """The original O(n^2) I-DT loop, rescanning the window for every candidate end point."""
+    fixations = []
+    i = 0
+    while i < len(times):
+        j = i + 1
+        while j < len(times):
+            duration = times[j] - times[i]
+            window_x, window_y = xs[i:j + 1], ys[i:j + 1]
+            if (max(window_x) - min(window_x)) + (max(window_y) - min(window_y)) > dispersion:
+                if duration >= duration_min:
+                    fixations.append({
+                        'start_time': times[i],
+                        'end_time': times[j - 1],
+                        'duration': times[j - 1] - times[i],
+                        'x': np.mean(xs[i:j]),
+                        'y': np.mean(ys[i:j]),
+                        'count': j - i
+                    })
+                    i = j
+                else:
+                    i += 1
+                break
+            j += 1
+        else:
+            break
+    return fixations
+
+
+def reading_gaze(n_fixations=20, samples_per_fixation=30, seed=0, rate_hz=90):
+    rng = np.random.default_rng(seed)
+    xs, ys = [], []
+    for k in range(n_fixations):
+        centre_x, centre_y = -0.8 + 0.08 * k, 0.5 - 0.2 * (k // 10)
+        xs.extend(centre_x + rng.normal(0, 0.004, samples_per_fixation))
+        ys.extend(centre_y + rng.normal(0, 0.004, samples_per_fixation))
+    times = np.arange(len(xs)) / rate_hz
+    return times, np.array(xs), np.array(ys)
+
+
+def assert_same_fixations(records, expected):
+    assert len(records) == len(expected)
+    for record, reference in zip(records, expected):
+        for name in ('start_time', 'end_time', 'duration', 'x', 'y', 'count'):
+            assert record[name] == pytest.approx(reference[name], abs=1e-12)
+
+
+@pytest.mark.parametrize('glitch_index', [0, 1, None])
+def test_matches_reference_with_outlier_at_start(glitch_index):
+    times, xs, ys = reading_gaze()
+    if glitch_index is not None:
+        xs[glitch_index], ys[glitch_index] = 0.9, -0.9
+    expected = reference_idt(times.tolist(), xs.tolist(), ys.tolist())
+    assert_same_fixations(detect_fixations_idt(times, xs, ys), expected)
+
+
+def test_first_sample_outlier_is_not_merged_into_first_fixation():
+    times, xs, ys = reading_gaze()
+    xs[0], ys[0] = 0.9, -0.9
+    first = detect_fixations_idt(times, xs, ys)[0]
+    assert first['start_idx'] == 1
+    assert first['x'] == pytest.approx(np.mean(xs[1:first['stop_idx']]))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64])
+def test_chunked_push_matches_reference(chunk_size):
+    times, xs, ys = reading_gaze(seed=3)
+    xs[0], ys[0] = -0.95, 0.95
+    detector = StreamingIDT()
+    records = []
+    for start in range(0, len(times), chunk_size):
+        stop = start + chunk_size
+        records.extend(detector.push(times[start:stop], xs[start:stop], ys[start:stop]))
+    assert_same_fixations(records, reference_idt(times.tolist(), xs.tolist(), ys.tolist()))
+
+
+def test_reset_seeds_the_next_recording():
+    times, xs, ys = reading_gaze(seed=5)
+    xs[0] = 0.9
+    detector = StreamingIDT()
+    detector.push(*reading_gaze(seed=4))
+    detector.reset()
+    assert_same_fixations(detector.push(times, xs, ys), reference_idt(times.tolist(), xs.tolist(), ys.tolist()))
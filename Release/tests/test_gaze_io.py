@@ -0,0 +1,38 @@
+# test_gaze_io.py
+import os
+
+import numpy as np
+
+import gaze_io
+
+
+def write_lines(file_path, times, mode='w'):
+    with open(file_path, mode) as f:
+        gaze_io.write_gaze_text(f, np.asarray(times), np.zeros(len(times)), np.zeros(len(times)))
+
+
+def test_sidecar_round_trip(tmp_path):
+    file_path = str(tmp_path / 'gazeData.txt')
+    write_lines(file_path, 1.7e9 + np.arange(5) / 90)
+    times, _, _ = gaze_io.load_gaze_arrays(file_path)
+    cached = gaze_io.read_sidecar(file_path)
+    assert cached is not None
+    np.testing.assert_array_equal(np.asarray(cached[0]), times)
+
+
+def test_append_during_parse_leaves_no_stale_sidecar(tmp_path, monkeypatch):
+    file_path = str(tmp_path / 'gazeData.txt')
+    write_lines(file_path, 1.7e9 + np.arange(5) / 90)
+    parse = gaze_io.parse_gaze_text
+
+    def parse_while_recording(path):
+        result = parse(path)
+        write_lines(path, [1.7e9 + 1.0], mode='a')  # The recorder appends a line meanwhile
+        return result
+
+    monkeypatch.setattr(gaze_io, 'parse_gaze_text', parse_while_recording)
+    assert len(gaze_io.load_gaze_arrays(file_path)[0]) == 5
+    assert gaze_io.read_sidecar(file_path) is None
+    assert not os.path.exists(gaze_io.sidecar_path(file_path) + '.tmp')
+    monkeypatch.setattr(gaze_io, 'parse_gaze_text', parse)
+    assert len(gaze_io.load_gaze_arrays(file_path)[0]) == 6
@@ -0,0 +1,88 @@
+# test_gaze_protocol.py
+import io
+import socket
+import threading
+import time
+
+import numpy as np
+
+from gaze_io import parse_gaze_bytes
+from gaze_protocol import GazeRecordReceiver, encode_records
+
+
+def records(n, start=0):
+    k = np.arange(start, start + n)
+    return 1.7e9 + k / 90, np.sin(k / 10), np.cos(k / 10)
+
+
+def test_records_split_across_recv_calls_are_reassembled():
+    times, xs, ys = records(1000)
+    data = encode_records(times, xs, ys)
+    sender, receiving = socket.socketpair()
+
+    def send():
+        # Piece sizes that are not multiples of the 24-byte record
+        position = 0
+        for size in [5, 30, 1, 7001, 24, 13] * 100:
+            if position >= len(data):
+                break
+            sender.sendall(data[position:position + size])
+            position += size
+            time.sleep(0.0005)
+        sender.sendall(data[position:])
+        sender.close()
+
+    thread = threading.Thread(target=send)
+    thread.start()
+    archive = io.StringIO()
+    receiver = GazeRecordReceiver(poll_interval=0.01)
+    assert receiver.receive(receiving, archive)  # True: the sender closed the connection
+    thread.join()
+    receiving.close()
+
+    assert receiver.received == 1000
+    got = receiver.read_new()
+    for column, expected in zip(got, (times, xs, ys)):
+        np.testing.assert_array_equal(column, expected)
+    archived_times, archived_x, archived_y, rejected = parse_gaze_bytes(archive.getvalue().encode())
+    assert rejected == 0 and len(archived_times) == 1000
+    np.testing.assert_allclose(archived_times, times, atol=1e-6)
+    np.testing.assert_array_equal(archived_x, xs)
+    assert len(receiver.read_new()[0]) == 0
+
+
+def test_a_slow_consumer_blocks_the_sender():
+    n_batches, batch = 200, 2000  # About 10 MB, far more than the socket buffers and the queue hold
+    sender, receiving = socket.socketpair()
+    stop = threading.Event()
+    receiver = GazeRecordReceiver(max_pending=2, poll_interval=0.01, interrupted=stop.is_set)
+    sent = []
+
+    def send():
+        for k in range(n_batches):
+            sender.sendall(encode_records(*records(batch, k * batch)))
+            sent.append(k)
+        sender.close()
+
+    sending = threading.Thread(target=send)
+    receiving_thread = threading.Thread(target=receiver.receive, args=(receiving, io.StringIO()))
+    sending.start()
+    receiving_thread.start()
+    try:
+        time.sleep(0.5)
+        # Nobody reads: the queue is full and the sender is stuck in sendall
+        assert sending.is_alive() and len(sent) < n_batches
+        assert receiver.received < n_batches * batch
+
+        total = []
+        deadline = time.monotonic() + 60
+        while sum(total) < n_batches * batch and time.monotonic() < deadline:
+            total.append(len(receiver.read_new()[0]))
+            time.sleep(0.001)
+        assert sum(total) == n_batches * batch
+        sending.join(10)
+        assert not sending.is_alive()
+    finally:
+        stop.set()
+        receiving_thread.join()
+        receiving.close()
@@ -0,0 +1,35 @@
+# test_live_metrics.py
+import pytest
+
+from live_metrics import GazeFileTailer, LiveSessionAnalysis
+from session_analysis import GazeAnalyzer
+from synthetic_gaze import synthetic_layout, write_recording
+
+
+def test_final_live_metrics_equal_the_results_window(tmp_path):
+    file_path = str(tmp_path / 'gazeData_calibrated.txt')
+    write_recording(file_path, synthetic_layout(), 6000)
+    with open(file_path, 'rb') as f:
+        data = f.read()
+
+    # The recorder appends the file in pieces, including half-written lines
+    growing = str(tmp_path / 'gazeData.txt')
+    tailer = GazeFileTailer(growing)
+    live = LiveSessionAnalysis()
+    with open(growing, 'wb') as f:
+        for start in range(0, len(data), 7001):
+            f.write(data[start:start + 7001])
+            f.flush()
+            live.push(*tailer.read_new())
+    tailer.close()
+    assert tailer.rejected == 0
+
+    analyzer = GazeAnalyzer(file_path)
+    report = analyzer.run_analysis()
+    metrics = live.metrics()
+    assert metrics['samples'] == len(analyzer.raw_data)
+    for name in ('n_fixations', 'n_forward', 'n_regression', 'avg_fixation_duration',
+                 'regression_rate', 'saccade_length_std'):
+        assert metrics[name] == pytest.approx(analyzer.result.metrics[name], rel=1e-9), name
+    assert {name: value for name, (value, unit, desc) in metrics['report'].items()} == \
+        pytest.approx({name: value for name, (value, unit, desc) in report.items()}, rel=1e-9)
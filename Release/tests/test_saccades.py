@@ -0,0 +1,87 @@
+# test_saccades.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from saccades import detect_saccades, saccade_metrics
+
+
+def reference_saccades(fixations):
+    # The per-row implementation the vectorized one replaced
+    saccades = []
+    for i in range(1, len(fixations)):
+        prev, curr = fixations.iloc[i - 1], fixations.iloc[i]
+        dx = curr['x'] - prev['x']
+        dy = curr['y'] - prev['y']
+        saccade_type = "noise"
+        if abs(dy) < 0.15:
+            if dx > 0.02: saccade_type = "forward"
+            elif dx < -0.02: saccade_type = "regression"
+        elif dy < -0.2:
+            saccade_type = "line_return"
+        saccades.append({'dx': dx, 'dy': dy, 'distance': np.sqrt(dx**2 + dy**2),
+                         'duration': curr['start_time'] - prev['end_time'], 'type': saccade_type})
+    return pd.DataFrame(saccades)
+
+
+def reference_metrics(saccades):
+    counts = saccades['type'].value_counts()
+    n_reg = counts.get('regression', 0)
+    n_fwd = counts.get('forward', 0)
+    fwd_saccades = saccades[saccades['type'] == 'forward']
+    reading_saccades = saccades[saccades['type'].isin(['forward', 'regression'])]
+    if not fwd_saccades.empty:
+        speeds = fwd_saccades['distance'] / (fwd_saccades['duration'] + 0.001)
+        speed_stability = speeds.std()
+    else:
+        speed_stability = 0
+    return {
+        'n_forward': n_fwd,
+        'n_regression': n_reg,
+        'regression_rate': n_reg / (n_reg + n_fwd) if n_reg + n_fwd > 0 else 0,
+        'saccade_length_std': fwd_saccades['distance'].std() if not fwd_saccades.empty else 0,
+        'line_noise': reading_saccades['dy'].abs().mean() if not reading_saccades.empty else 0,
+        'speed_instability': speed_stability
+    }
+
+
+def fixation_table(xs, ys):
+    start = np.arange(len(xs)) * 0.3
+    return pd.DataFrame({'x': np.asarray(xs, dtype=float), 'y': np.asarray(ys, dtype=float),
+                         'start_time': start, 'end_time': start + 0.2})
+
+
+def assert_matches_reference(fixations):
+    saccades = detect_saccades(fixations['x'], fixations['y'], fixations['start_time'], fixations['end_time'])
+    expected = reference_saccades(fixations)
+    assert len(saccades['dx']) == len(expected)
+    if len(expected):
+        for column in ('dx', 'dy', 'distance', 'duration'):
+            np.testing.assert_array_equal(saccades[column], expected[column].to_numpy())
+        assert saccades['type'].tolist() == expected['type'].tolist()
+
+        metrics = saccade_metrics(saccades['type'], saccades['distance'], saccades['dy'], saccades['duration'])
+        for name, value in reference_metrics(expected).items():
+            assert metrics[name] == pytest.approx(value, nan_ok=True, rel=1e-12), name
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_reading_matches_reference(seed):
+    rng = np.random.default_rng(seed)
+    n = 200
+    xs = np.cumsum(rng.normal(0.05, 0.08, n))
+    ys = np.round(rng.uniform(-1, 1, n), 1) + rng.normal(0, 0.05, n)
+    assert_matches_reference(fixation_table(xs, ys))
+
+
+@pytest.mark.parametrize('xs, ys', [
+    ([], []),
+    ([0.1], [0.2]),
+    ([0.0, 0.3], [0.0, 0.0]),                     # A single forward move: NaN std
+    ([0.0, 0.02, 0.0, -0.02], [0.0, 0.0, 0.0, 0.0]),  # |dx| exactly at the threshold is noise
+    ([0.0, 0.5, 1.0], [0.0, 0.15, 0.0]),           # |dy| exactly at the threshold leaves the line
+    ([0.0, -0.8, 0.0], [0.2, 0.0, -0.3]),          # dy exactly -0.2 is not a line return
+    ([0.0, -0.5, -0.9], [0.0, 0.0, 0.0]),          # Regressions only
+])
+def test_edge_cases_match_reference(xs, ys):
+    assert_matches_reference(fixation_table(xs, ys))
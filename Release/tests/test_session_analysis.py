@@ -0,0 +1,18 @@
+# test_session_analysis.py
+from session_analysis import GazeAnalyzer, write_analysis_results
+from synthetic_gaze import synthetic_layout, write_recording
+
+
+def test_analysis_of_a_synthetic_session(tmp_path):
+    file_path = str(tmp_path / 'gazeData_calibrated.txt')
+    write_recording(file_path, synthetic_layout(), 5000)
+    analyzer = GazeAnalyzer(file_path)
+    metrics = analyzer.run_analysis()
+    assert len(analyzer.raw_data) == 5000
+    assert not analyzer.fixations.empty and not analyzer.saccades.empty
+    assert metrics
+
+    write_analysis_results(metrics, str(tmp_path))
+    text = (tmp_path / 'analysis_results.txt').read_text()
+    assert text.startswith("=== DYSLEXIA SCREENING ANALYSIS ===")
+    assert all(f"{name}: " in text for name in metrics)
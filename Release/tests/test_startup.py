@@ -0,0 +1,27 @@
+# test_startup.py
+import pytest
+
+from benchmark import STARTUP_DEFERRED, bench_startup, parse_importtime
+
+REPORT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       350 |        900 |   numpy.core
+import time:      2100 |       3000 | numpy
+import time:        40 |       3040 | gaze_io
+"""
+
+
+def test_parse_importtime():
+    rows = parse_importtime(REPORT)
+    assert [row[0] for row in rows] == ['_io', 'numpy.core', 'numpy', 'gaze_io']
+    module, self_seconds, cumulative, depth = rows[1]
+    assert self_seconds == pytest.approx(350e-6)
+    assert cumulative == pytest.approx(900e-6)
+    assert depth == 1
+    assert rows[3][3] == 0
+
+
+def test_main_defers_heavy_modules():
+    pytest.importorskip('PyQt5')
+    offenders = bench_startup('main')
+    assert offenders == [], f"imported before the window shows: {offenders} (deferred: {STARTUP_DEFERRED})"
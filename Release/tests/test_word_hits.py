@@ -0,0 +1,34 @@
+# test_word_hits.py
+import numpy as np
+
+from gaze_io import load_gaze_arrays
+from screen_coords import normalize_gaze_to_screen
+from text_layout import load_word_layout
+from word_hits import DWELL_FILENAME, GAZE_FILENAME, HIT_COUNTS_FILENAME, find_sessions, process_session
+from word_index import WordIndex
+
+
+def test_hit_counts_match_per_sample_lookup(make_session):
+    session_dir = make_session(n_samples=2000)
+    totals = process_session(str(session_dir))
+
+    layout = load_word_layout(str(session_dir))
+    word_index = WordIndex(layout['boxes'], layout['identifiers'])
+    times, xs, ys = load_gaze_arrays(str(session_dir / GAZE_FILENAME))
+    expected = np.zeros(len(word_index), dtype=int)
+    for x, y in zip(xs, ys):
+        screen_x, screen_y = normalize_gaze_to_screen((x, y), layout['screen_width'], layout['screen_height'])
+        for k in word_index.lookup(screen_x, screen_y):
+            expected[k] += 1
+
+    lines = (session_dir / HIT_COUNTS_FILENAME).read_text().splitlines()
+    assert [int(line.split(': ')[1].split(' - ')[0]) for line in lines] == expected.tolist()
+    assert totals['hits'] == expected.sum() and totals['samples'] == len(times)
+    assert (session_dir / DWELL_FILENAME).exists()
+
+
+def test_find_sessions(make_session, tmp_path):
+    session_dir = make_session()
+    (tmp_path / 'alice_data' / 'no_layout').mkdir()
+    (tmp_path / 'alice_data' / 'no_layout' / GAZE_FILENAME).write_text('')
+    assert list(find_sessions(str(tmp_path))) == [str(session_dir)]
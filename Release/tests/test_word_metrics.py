@@ -0,0 +1,57 @@
+# test_word_metrics.py
+import numpy as np
+import pytest
+
+from session_analysis import GazeAnalyzer
+from text_layout import load_word_layout
+from word_metrics import session_word_metrics, word_reading_measures
+
+
+def test_first_pass():
+    measures = word_reading_measures([0, 0, 1, 2, 2, 2], [.1, .2, .3, .1, .1, .2], 3)
+    assert measures['first_fixation_duration'] == pytest.approx([.1, .3, .1])
+    assert measures['gaze_duration'] == pytest.approx([.3, .3, .4])
+    assert measures['total_time'] == pytest.approx([.3, .3, .4])
+    assert measures['n_fixations'].tolist() == [2, 1, 3]
+    assert not measures['skipped'].any()
+
+
+def test_leaving_the_text_ends_the_pass():
+    measures = word_reading_measures([0, 1, -1, 1, 2], [.2, .2, .3, .2, .2], 3)
+    assert measures['gaze_duration'] == pytest.approx([.2, .2, .2])
+    assert measures['total_time'] == pytest.approx([.2, .4, .2])
+    assert measures['n_fixations'].tolist() == [1, 2, 1]
+    assert measures['regressions_in'].sum() == 0
+
+
+def test_skipped_words_have_no_first_pass():
+    # Word 1 is skipped and read after a regression; word 3 follows the last word read
+    measures = word_reading_measures([0, 2, 1], [.2, .2, .2], 4)
+    assert measures['skipped'].tolist() == [False, True, False, False]
+    assert np.isnan(measures['gaze_duration'][[1, 3]]).all()
+    assert measures['total_time'][1] == pytest.approx(.2)
+
+
+def test_regressions_in_and_out():
+    measures = word_reading_measures([0, 1, 2, 0, -1, 3, 1], [.2] * 7, 4)
+    assert measures['regressions_out'].tolist() == [0, 0, 1, 1]
+    assert measures['regressions_in'].tolist() == [1, 1, 0, 0]
+    # The re-reading of word 0 is not its first pass
+    assert measures['gaze_duration'][0] == pytest.approx(.2)
+
+
+def test_no_fixations_on_the_text():
+    measures = word_reading_measures([-1, -1], [.2, .2], 2)
+    assert measures['n_fixations'].tolist() == [0, 0]
+    assert np.isnan(measures['gaze_duration']).all() and not measures['skipped'].any()
+
+
+def test_session_table(make_session):
+    session_dir = make_session()
+    analyzer = GazeAnalyzer(str(session_dir / 'gazeData_calibrated.txt'))
+    analyzer.run_analysis()
+    table = session_word_metrics(analyzer.result.fixations, load_word_layout(str(session_dir)))
+    assert len(table) == len(load_word_layout(str(session_dir))['words'])
+    assert table['total_time'].sum() <= analyzer.result.fixations['duration'].sum() + 1e-9
+    read = table['gaze_duration'].notna()
+    assert (table.loc[read, 'gaze_duration'] <= table.loc[read, 'total_time'] + 1e-9).all()
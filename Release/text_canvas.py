@@ -0,0 +1,83 @@
+# text_canvas.py
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtGui import QPainter, QColor, QFont, QFontMetrics, QPalette, QStaticText
+from PyQt5.QtCore import Qt, QPointF
+
+import numpy as np
+
+from word_index import WordIndex
+
+class TextCanvas(QWidget):
+    """
+    Displays the reading text as one widget instead of one QLabel per word.
+    The text is laid out once per set_text with QFontMetrics, wrapping and centring
+    it the way the word labels were; paintEvent draws every word from cached
+    QStaticText. The layout is exposed as plain data for hit-testing and analysis:
+    boxes is an (n, 4) array of (x, y, width, height) in the parent's coordinates,
+    with identifiers ("y-x" of the word before vertical centring) and words alongside.
+    """
+    WORD_BACKGROUND = QColor(225, 225, 225, int(0.7 * 255))  # Slightly darker shade of white
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.text_font = QFont()
+        self.identifiers, self.words = [], []
+        self.boxes = np.empty((0, 4))
+        self.line_spacing_factor = None
+        self.total_text_height = 0
+        self._static_texts = []
+
+    def set_text(self, text, font, line_spacing_factor, x_start, top_margin, bottom_margin):
+        """Lays text out over the widget's width between x_start margins and repaints."""
+        self.text_font = QFont(font)
+        self.line_spacing_factor = line_spacing_factor
+        fm = QFontMetrics(self.text_font)
+        line_height = fm.height()
+        width, height = self.width(), self.height()
+        x, y = x_start, top_margin
+
+        self.identifiers, self.words, boxes = [], [], []
+        for word in text.split():
+            word_width = fm.width(word + ' ')
+            if x + word_width > width - x_start:
+                x = x_start
+                y += int(line_height * line_spacing_factor)
+            self.identifiers.append(f"{y}-{x}")
+            self.words.append(word)
+            boxes.append((int(x), int(y), fm.width(word), line_height))  # The box excludes the following space
+            x += word_width
+        self.boxes = np.array(boxes, dtype=np.float64).reshape(-1, 4)
+
+        # Centre the text vertically if it leaves room above the bottom margin
+        total_text_height = y + line_height - top_margin
+        if total_text_height < height - bottom_margin:
+            extra_space = (height - bottom_margin - total_text_height) / 2
+            total_text_height += 2 * extra_space
+            self.boxes[:, 1] = (self.boxes[:, 1] + extra_space).astype(int)
+        self.total_text_height = total_text_height + top_margin  # Include the adjusted initial offset
+
+        self._static_texts = []
+        for word in self.words:
+            static_text = QStaticText(word)
+            static_text.setTextFormat(Qt.PlainText)
+            static_text.prepare(font=self.text_font)
+            self._static_texts.append(static_text)
+        self.update()
+
+    def word_index(self):
+        return WordIndex(self.boxes, self.identifiers)
+
+    def paintEvent(self, event):
+        if not self._static_texts:
+            return
+        painter = QPainter(self)
+        painter.setFont(self.text_font)
+        painter.setPen(self.palette().color(QPalette.WindowText))
+        exposed = event.rect()
+        for (x, y, w, h), static_text in zip(self.boxes.tolist(), self._static_texts):
+            if y > exposed.bottom() or y + h < exposed.top():
+                continue
+            painter.fillRect(int(x), int(y), int(w), int(h), self.WORD_BACKGROUND)
+            painter.drawStaticText(QPointF(x, y), static_text)  # Positioned by its top-left corner
+        painter.end()
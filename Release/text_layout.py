@@ -0,0 +1,78 @@
+# text_layout.py
+"""
+Per-session text layout manifest: everything needed to map gaze to words offline.
+The manifest is JSON lines: a header object with the screen size, DPI scale, font
+and line spacing, then one compact [index, identifier, text, x, y, width, height]
+array per word in reading order.
+"""
+import json
+import os
+
+import numpy as np
+
+LAYOUT_FILENAME = 'word_layout.jsonl'
+LAYOUT_FORMAT = 'gazelexia-text-layout'
+LAYOUT_VERSION = 1
+
+
+def save_word_layout(directory, screen_width, screen_height, identifiers, words, boxes,
+                     dpi_scale=1.0, font=None, line_spacing=None):
+    """
+    Stores the on-screen word boxes of the text canvas so sessions can be analysed without Qt.
+    font is (family, point size) of the displayed text.
+    """
+    header = {
+        'format': LAYOUT_FORMAT,
+        'version': LAYOUT_VERSION,
+        'screen_width': screen_width,
+        'screen_height': screen_height,
+        'dpi_scale': dpi_scale,
+        'font': {'family': font[0], 'size': font[1]} if font else None,
+        'line_spacing': line_spacing,
+        'n_words': len(words)
+    }
+    lines = [json.dumps(header)]
+    lines.extend(json.dumps([k, identifier, word] + [int(v) for v in box], ensure_ascii=False)
+                 for k, (identifier, word, box) in enumerate(zip(identifiers, words, np.asarray(boxes).tolist())))
+    file_path = os.path.join(directory, LAYOUT_FILENAME)
+    try:
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+    except OSError as e:
+        print(f"Could not save word layout: {e}")
+
+
+def has_word_layout(directory):
+    return os.path.exists(os.path.join(directory, LAYOUT_FILENAME))
+
+
+def _load_manifest(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('format') != LAYOUT_FORMAT or header.get('version', 0) > LAYOUT_VERSION:
+            raise ValueError(f"{file_path} is not a supported text layout manifest")
+        rows = [json.loads(line) for line in f if line.strip()]
+    rows.sort(key=lambda row: row[0])
+    font = header.get('font')
+    return {
+        'screen_width': header['screen_width'],
+        'screen_height': header['screen_height'],
+        'dpi_scale': header.get('dpi_scale', 1.0),
+        'font': (font['family'], font['size']) if font else None,
+        'line_spacing': header.get('line_spacing'),
+        'identifiers': [row[1] for row in rows],
+        'words': [row[2] for row in rows],
+        'boxes': np.array([row[3:7] for row in rows], dtype=np.float64).reshape(-1, 4)
+    }
+
+
+def load_word_layout(directory):
+    """
+    Returns the stored layout as a dict with screen_width, screen_height, dpi_scale,
+    font, line_spacing, identifiers, words and an (n, 4) array of boxes whose row k
+    is word k, or None if the session has none.
+    """
+    file_path = os.path.join(directory, LAYOUT_FILENAME)
+    if not os.path.exists(file_path):
+        return None
+    return _load_manifest(file_path)
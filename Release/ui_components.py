@@ -1,17 +1,20 @@
 # ui_components.py
 
 from PyQt5.QtWidgets import QApplication, QMainWindow, QLabel, QWidget, QPushButton, QVBoxLayout, QHBoxLayout, QSpacerItem, QSizePolicy
-from PyQt5.QtGui import QPainter, QColor, QFont, QFontMetrics, QPen
+from PyQt5.QtGui import QPainter, QColor, QFont, QPen
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QRect, QPoint
 import sys, subprocess, os
+import numpy as np
 from datetime import datetime
 from overlays import GazeOverlay, HeatmapOverlay
-from data_handling import normalize_gaze_to_screen, parse_word_hit_counts, GazeDataProcessor
-from calibration import CalibrationScreen
+from text_canvas import TextCanvas
+from data_handling import normalize_gaze_array, parse_word_hit_counts, GazeDataProcessor
+from gaze_io import load_gaze_arrays
+from text_layout import save_word_layout
+from calibration_model import load_calibration_model
 from userpage import UserPage
 from ui_styles import get_button_style, get_exit_button_style, get_label_style, get_text_content, get_theme 
 from config import app_config
-from results_window import ResultsWindow
 class GazeVisualizer(QMainWindow):
 
     def __init__(self, screen_width, screen_height):
@@ -23,7 +26,11 @@ class GazeVisualizer(QMainWindow):
         self.setupUI()
         self.current_directory = None  # Initialize the directory attribute
         self.recording_process = None
+        self.gaze_reader = None
         self.gaze_processor = None
+        self.live_analysis = None
+        self.heatmap_overlay = None
+        self.playback_heatmap = None
     
     def toggle_night_mode(self):
         # Toggle the night mode state and update the stylesheet
@@ -45,8 +52,7 @@ class GazeVisualizer(QMainWindow):
     def hideUI(self):
         # Hide all non-essential UI elements except 'Next' and 'Exit'
         #self.night_mode_button.hide()
-        for label in self.labels:
-            label[1].hide()
+        self.text_canvas.hide()
         self.gaze_overlay.hide()
         for button in self.other_buttons:
             button.hide()
@@ -55,8 +61,7 @@ class GazeVisualizer(QMainWindow):
     def showUI(self):
         # Restore all UI elements after calibration
         #self.night_mode_button.show()
-        for label in self.labels:
-            label[1].show()
+        self.text_canvas.show()
         self.gaze_overlay.show()
         for button in self.other_buttons:
             button.show()
@@ -68,44 +73,16 @@ class GazeVisualizer(QMainWindow):
             text = get_text_content()
 
         font_family, font_size, line_spacing_factor = get_label_style(self.screen_height)
-        font = QFont(font_family, font_size)
-        fm = QFontMetrics(font)
-        line_height = fm.height()
-
-        max_line_width = self.screen_width * 0.8  # Use 80% of screen width for text
-        x_start = self.screen_width * 0.1  # Start 10% from the left
-        top_margin = self.screen_height * 0.08  # Adjust the top margin to increase distance from the top edge
-        bottom_margin = self.screen_height * 0.15  # Adjust the bottom margin to increase distance from the bottom edge
-        x, y = x_start, top_margin
-
-        self.labels = []
-        for word in text.split():
-            word_width = fm.width(word + ' ')
-            if x + word_width > self.screen_width - x_start:
-                x = x_start
-                y += int(line_height * line_spacing_factor)
-
-            identifier = f"{y}-{x}"
-            label = QLabel(word, self)
-            label.setFont(font)
-            label.adjustSize()
-            label.setStyleSheet("background-color: rgba(225, 225, 225, 0.7);")  # Slightly darker shade of white as background
-            label.move(int(x), int(y))
-            label.show()
-            self.labels.append((identifier, label, word))
-
-            x += word_width
-
-        # Adjust vertical position if necessary to ensure bottom margin
-        total_text_height = y + line_height - top_margin
-        if total_text_height < self.screen_height - bottom_margin:
-            extra_space = (self.screen_height - bottom_margin - total_text_height) / 2
-            total_text_height += 2 * extra_space
-            for identifier, label, word in self.labels:
-                label.move(label.x(), int(label.y() + extra_space))
-
-        self.total_text_height = total_text_height + top_margin  # Include the adjusted initial offset
-
+        if not hasattr(self, 'text_canvas'):
+            self.text_canvas = TextCanvas(self)
+            self.text_canvas.setGeometry(0, 0, self.screen_width, self.screen_height)
+        self.text_canvas.set_text(
+            text, QFont(font_family, font_size), line_spacing_factor,
+            x_start=self.screen_width * 0.1,  # Use 80% of screen width for text, starting 10% from the left
+            top_margin=self.screen_height * 0.08,  # Distance from the top edge
+            bottom_margin=self.screen_height * 0.15)  # Distance from the bottom edge
+        self.text_canvas.show()
+        self.total_text_height = self.text_canvas.total_text_height
 
     def setupButtons(self):
         central_widget = QWidget(self)
@@ -157,6 +134,7 @@ class GazeVisualizer(QMainWindow):
         self.playback_button = self.other_buttons[1]
 
     def startCalibration(self):
+        from calibration import CalibrationScreen  # Loaded on first use to keep startup light
         self.calibration_screen = CalibrationScreen(self)
         self.calibration_screen.show()
 
@@ -168,8 +146,8 @@ class GazeVisualizer(QMainWindow):
     def toggleRecording(self):
         if self.recording_process:
             # Stop the recording if it is currently running
-            self.recording_process.terminate()
-            self.recording_process = None
+            self.stopRecorder()
+            self.stopLiveAnalysis()
             self.record_button.setText("Record")  # Update button text to reflect available action
             print("Recording stopped.")
         else:
@@ -182,17 +160,82 @@ class GazeVisualizer(QMainWindow):
             file_path = os.path.join(directory, filename)
             
             open(file_path, 'w').close()  # Ensure the file is empty before starting to record
-            executable_path = "/Users/borana/Documents/GitHub/DyslexiaProject/Release/cpp_exec/Tobii_api_test1"
-            window_id = str(self.winId().__int__())
-            cmd = [executable_path, window_id, file_path]
-            self.recording_process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            canvas = self.text_canvas  # Layout the reader sees, for offline analysis
+            save_word_layout(directory, self.width(), self.height(), canvas.identifiers, canvas.words, canvas.boxes,
+                             dpi_scale=self.dpi_scale_factor,
+                             font=(canvas.text_font.family(), canvas.text_font.pointSize()),
+                             line_spacing=canvas.line_spacing_factor)
+            cmd = self.launchRecorder(file_path, live=True)
+            self.startLiveAnalysis(self.gaze_reader or file_path, load_calibration_model(directory))
             self.record_button.setText("Stop Recording")  # Update button text to reflect available action
             print(f"Starting general recording with command: {cmd}")
 
+    def launchRecorder(self, file_path, live=False):
+        # With the socket transport the recorder streams binary records to a reader thread,
+        # which writes file_path as the archive; otherwise the recorder writes it directly
+        window_id = str(self.winId().__int__())
+        cmd = app_config.recorder_command + [window_id, file_path]
+        if app_config.gaze_transport == 'socket':
+            from gaze_transport import GazeSocketReader
+            self.gaze_reader = GazeSocketReader(file_path, live=live)
+            self.gaze_reader.start()
+            cmd += ['--socket', self.gaze_reader.address]
+        # Output goes to our console: undrained PIPEs would eventually block the recorder
+        self.recording_process = subprocess.Popen(cmd)
+        return cmd
+
+    def stopRecorder(self):
+        if self.recording_process:
+            self.recording_process.terminate()
+            self.recording_process = None
+        if self.gaze_reader:
+            # The reader ends by itself once the recorder's connection closes
+            if not self.gaze_reader.wait(1000):
+                self.gaze_reader.requestInterruption()
+                self.gaze_reader.wait()
+            self.gaze_reader = None
+
+    def startLiveAnalysis(self, source, calibration):
+        # Analyses the gaze file as the recorder writes it and shows running metrics to the operator
+        if not hasattr(self, 'live_metrics_label'):
+            self.live_metrics_label = QLabel(self)
+            self.live_metrics_label.setFont(QFont("Arial", 11))
+            self.live_metrics_label.setStyleSheet("color: gray; background: transparent;")
+            self.live_metrics_label.setGeometry(int(self.screen_width * 0.03), 0, int(self.screen_width * 0.6), 30)
+        self.live_metrics_label.setText("Live analysis: waiting for gaze data...")
+        self.live_metrics_label.show()
+        self.live_metrics_label.raise_()
+        from live_analysis import LiveAnalysisThread  # Pulls in the analysis engine (pandas)
+        self.live_analysis = LiveAnalysisThread(source, calibration)
+        self.live_analysis.metrics_updated.connect(self.showLiveMetrics)
+        self.live_analysis.start()
+
+    def stopLiveAnalysis(self):
+        if self.live_analysis:
+            self.live_analysis.requestInterruption()
+            self.live_analysis.wait()
+            self.live_analysis = None
+            self.live_metrics_label.hide()
+
+    def showLiveMetrics(self, metrics):
+        if metrics['sample_rate'] == 0:
+            status = "NO GAZE DATA"
+        elif metrics['invalid_samples'] > 0.2 * metrics['samples']:
+            status = f"tracking loss {metrics['invalid_samples'] / metrics['samples']:.0%}"
+        else:
+            status = "tracking OK"
+        text = f"Live: {metrics['sample_rate']:.0f} Hz, {status} | {metrics['n_fixations']} fixations"
+        if metrics['report']:
+            text += " | " + " | ".join(
+                f"{name} {value * 100:.0f}%" if unit == "%" else f"{name} {value:.2f}{unit}"
+                for name, (value, unit, desc) in metrics['report'].items())
+        self.live_metrics_label.setText(text)
+
     def togglePlayback(self):
         if self.gaze_processor and self.gaze_processor.isRunning():
             # Stop the playback if it is currently running
-            self.gaze_processor.terminate()
+            self.gaze_processor.requestInterruption()
+            self.gaze_processor.wait()
             self.gaze_processor = None
             self.playback_button.setText("Playback")  # Update button text to reflect available action
             print("Playback stopped.")
@@ -206,12 +249,19 @@ class GazeVisualizer(QMainWindow):
             file_path = os.path.join(directory, filename)
 
             if os.path.exists(file_path):
-                gaze_data = []
-                with open(file_path, 'r') as file:
-                    gaze_data = file.readlines()
+                gaze_data = load_gaze_arrays(file_path)
 
-                self.gaze_processor = GazeDataProcessor(gaze_data, self.width(), self.height(), self.labels, directory)
+                refresh_rate = QApplication.primaryScreen().refreshRate()
+                self.gaze_processor = GazeDataProcessor(gaze_data, self.width(), self.height(), self.text_canvas.word_index(), directory,
+                                                        refresh_rate=refresh_rate)
                 self.gaze_processor.update_gaze_signal.connect(lambda ts, x, y: self.gaze_overlay.update_gaze_position(x, y))
+                # The heatmap of what has been played so far grows with the playback; 'H' shows it
+                if self.playback_heatmap is not None:
+                    self.playback_heatmap.deleteLater()
+                self.playback_heatmap = HeatmapOverlay(np.empty((0, 2)), {}, self)
+                self.playback_heatmap.setGeometry(0, 0, self.width(), self.height())
+                self.playback_heatmap.hide()
+                self.gaze_processor.samples_played.connect(self.playback_heatmap.add_points)
                 self.gaze_processor.finished.connect(self.onPlaybackFinished)  # Connect the finished signal to the slot
                 self.gaze_processor.start()
                 self.playback_button.setText("Stop Playback")  # Update button text to reflect available action
@@ -219,6 +269,34 @@ class GazeVisualizer(QMainWindow):
             else:
                 print("Calibrated gaze data file does not exist.")
     
+    def keyPressEvent(self, event):
+        # 'S' toggles smoothing of the visible heatmaps
+        if event.key() == Qt.Key_S:
+            for heatmap in (self.heatmap_overlay, self.playback_heatmap):
+                if heatmap is not None and heatmap.isVisible():
+                    heatmap.set_smoothing(0 if heatmap.smooth_sigma else 1.5)
+            return
+        # Playback controls: '+'/'-' double or halve the speed, arrow keys seek 5 seconds, 'H' toggles the heatmap
+        if self.gaze_processor and self.gaze_processor.isRunning():
+            clock = self.gaze_processor.clock
+            if event.key() in (Qt.Key_Plus, Qt.Key_Equal):
+                self.gaze_processor.set_speed(clock.speed * 2)
+            elif event.key() == Qt.Key_Minus:
+                self.gaze_processor.set_speed(clock.speed / 2)
+            elif event.key() == Qt.Key_Right:
+                self.gaze_processor.seek(clock.position() + 5)
+            elif event.key() == Qt.Key_Left:
+                self.gaze_processor.seek(clock.position() - 5)
+            elif event.key() == Qt.Key_H:
+                self.playback_heatmap.setVisible(not self.playback_heatmap.isVisible())
+                return
+            else:
+                super().keyPressEvent(event)
+                return
+            print(f"Playback at {clock.position():.1f}s, speed {clock.speed}x")
+            return
+        super().keyPressEvent(event)
+
     def onPlaybackFinished(self):
         self.gaze_processor = None
         self.playback_button.setText("Playback")
@@ -226,8 +304,8 @@ class GazeVisualizer(QMainWindow):
 
     def stopRecording(self):
         if self.recording_process:
-            self.recording_process.terminate()
-            self.recording_process = None
+            self.stopRecorder()
+            self.stopLiveAnalysis()
             print("Recording stopped.")
 
     def startCalibrationRecording(self, dot_id, directory):
@@ -238,10 +316,7 @@ class GazeVisualizer(QMainWindow):
         filename = f'gazeData_{dot_id}.txt'
         file_path = os.path.join(directory, filename)
         open(file_path, 'w').close()  # Ensure the file is empty before starting to record
-        executable_path = "/Users/borana/Documents/GitHub/DyslexiaProject/Release/cpp_exec/Tobii_api_test1"
-        window_id = str(self.winId().__int__())
-        cmd = [executable_path, window_id, file_path]
-        self.recording_process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        cmd = self.launchRecorder(file_path)
         print(f"Starting calibration recording for dot {dot_id} with command: {cmd}")
 
     def setDirectory(self, directory):
@@ -256,7 +331,7 @@ class GazeVisualizer(QMainWindow):
     def updateTextDisplay(self):
         # This method updates the text content on the display
         text = get_text_content(app_config.session_directory)
-        self.setupLabels(text)  # Assuming setupLabels can take text as an argument
+        self.setupLabels(text)  # Lays the new text out on the existing canvas
 
     def showHeatmapOnText(self):
         """Show heatmap based on the gaze data stored in the current directory."""
@@ -272,14 +347,8 @@ class GazeVisualizer(QMainWindow):
             print("Gaze data file does not exist.")
             return
 
-        gaze_points = []
-        with open(file_path, 'r') as file:
-            for line in file:
-                if 'Gaze point:' in line:
-                    _, gaze_str = line.split('] Gaze point: ')
-                    gaze_point = [float(val) for val in gaze_str.strip()[1:-1].split(',')]
-                    screen_x, screen_y = normalize_gaze_to_screen(gaze_point, self.width(), self.height())
-                    gaze_points.append((screen_x, screen_y))
+        _, xs, ys = load_gaze_arrays(file_path)
+        gaze_points = np.column_stack(normalize_gaze_array(xs, ys, self.width(), self.height()))
 
         print(f"Number of parsed gaze points: {len(gaze_points)}")
 
@@ -289,7 +358,7 @@ class GazeVisualizer(QMainWindow):
             return
 
         word_hit_data = parse_word_hit_counts(word_hit_file_path)
-        if gaze_points:
+        if len(gaze_points):
             self.heatmap_overlay = HeatmapOverlay(gaze_points, word_hit_data, self)
             self.heatmap_overlay.setGeometry(0, 0, self.width(), self.height())
             self.heatmap_overlay.show()
@@ -298,6 +367,7 @@ class GazeVisualizer(QMainWindow):
             print("No gaze points parsed or heatmap overlay not properly set up.")
 
     def closeEvent(self, event):
+        self.stopLiveAnalysis()
         # Check if gaze_processor exists and call write_hit_counts_to_file
         if hasattr(self, 'gaze_processor') and self.gaze_processor is not None:
             self.gaze_processor.write_hit_counts_to_file()
@@ -310,5 +380,6 @@ class GazeVisualizer(QMainWindow):
             # QMessageBox.warning(self, "No Session", "Please select a user session first!")
             return
 
+        from results_window import ResultsWindow  # Pulls in pandas and matplotlib
         self.results_window = ResultsWindow(self)
         self.results_window.show()
\ No newline at end of file
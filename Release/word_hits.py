@@ -0,0 +1,148 @@
+# word_hits.py
+"""
+Headless per-word hit counts and dwell times.
+Computes what a playback would record, without a display and without the
+real-time pacing, from the session's stored word layout and calibrated gaze data.
+
+Usage: python word_hits.py SESSION_OR_DATA_DIR [...]
+"""
+import argparse
+import csv
+import os
+import sys
+
+import numpy as np
+
+from gaze_io import load_gaze_arrays
+from screen_coords import normalize_gaze_array
+from text_layout import has_word_layout, load_word_layout, LAYOUT_FILENAME
+from word_index import WordIndex
+
+GAZE_FILENAME = 'gazeData_calibrated.txt'
+HIT_COUNTS_FILENAME = 'word_hit_counts.txt'
+DWELL_FILENAME = 'word_dwell_times.csv'
+
+
+def write_hit_counts_file(file_path, word_hits):
+    with open(file_path, 'w') as file:
+        for key, data in word_hits.items():
+            coords_str = f" - Coords: {data['coords'][0]}, {data['coords'][1]}" if data['coords'] else ""
+            timestamps_str = ', '.join(data['timestamps'])
+            file.write(f"{key}: {data['count']}{coords_str} - Timestamps: {timestamps_str}\n")
+
+
+def parse_word_hit_counts(file_path):
+    word_hit_data = []
+    with open(file_path, 'r') as file:
+        for line in file:
+            parts = line.strip().split(' - ')
+            identifier, count_str = parts[0], parts[1]
+            timestamps_str = parts[3] if len(parts) > 3 else ""
+            coords = tuple(map(float, identifier.split('-')))
+            count = int(count_str.split(': ')[1])
+            timestamps = timestamps_str.split(', ')
+            word_hit_data.append({'coords': coords, 'count': count, 'timestamps': timestamps})
+    return word_hit_data
+
+
+def compute_word_hits(times, xs, ys, word_index, screen_width, screen_height, max_sample_gap=0.1):
+    """
+    Maps every gaze sample to a word and returns (counts, dwell_times, word_of_sample).
+    A sample's dwell is the time until the next sample, capped at max_sample_gap
+    so tracking dropouts do not count as reading time.
+    """
+    times = np.asarray(times, dtype=float)
+    screen_x, screen_y = normalize_gaze_array(xs, ys, screen_width, screen_height)
+    word_of_sample = word_index.lookup_many(screen_x, screen_y)
+
+    dt = np.diff(times, append=times[-1]) if len(times) else np.empty(0)
+    dt = np.clip(dt, 0, max_sample_gap)
+
+    hit = word_of_sample >= 0
+    counts = np.bincount(word_of_sample[hit], minlength=len(word_index))
+    dwell_times = np.bincount(word_of_sample[hit], weights=dt[hit], minlength=len(word_index))
+    return counts, dwell_times, word_of_sample
+
+
+def _hit_timestamps(times, word_of_sample, n_words):
+    # Timestamp strings grouped by word, formatted like GazeDataProcessor does
+    micros = (np.asarray(times) * 1e6).round().astype(np.int64)
+    stamps = np.datetime_as_string(micros.astype('datetime64[us]'), unit='us')
+    stamps = np.char.replace(stamps, 'T', ' ')
+    hit = np.flatnonzero(word_of_sample >= 0)
+    order = hit[np.argsort(word_of_sample[hit], kind='stable')]
+    bounds = np.searchsorted(word_of_sample[order], np.arange(n_words + 1))
+    return [stamps[order[bounds[k]:bounds[k + 1]]].tolist() for k in range(n_words)]
+
+
+def session_word_hits(times, xs, ys, word_index, screen_width, screen_height, max_sample_gap=0.1):
+    """
+    The word_hit_counts.txt entries of a whole recording (identifier -> count, coords
+    and timestamps), plus the counts and dwell times from compute_word_hits.
+    """
+    counts, dwell_times, word_of_sample = compute_word_hits(
+        times, xs, ys, word_index, screen_width, screen_height, max_sample_gap)
+    timestamps = _hit_timestamps(times, word_of_sample, len(word_index))
+    word_hits = {}
+    for k, identifier in enumerate(word_index.identifiers):
+        left, top = word_index.boxes[k][:2]
+        word_hits[identifier] = {
+            'count': int(counts[k]),
+            'timestamps': timestamps[k],
+            'coords': (int(left), int(top)) if counts[k] else None
+        }
+    return word_hits, counts, dwell_times
+
+
+def process_session(directory, max_sample_gap=0.1):
+    """Writes word_hit_counts.txt and word_dwell_times.csv for one session; returns the totals."""
+    layout = load_word_layout(directory)
+    if layout is None:
+        raise FileNotFoundError(f"No {LAYOUT_FILENAME} in {directory}")
+    times, xs, ys = load_gaze_arrays(os.path.join(directory, GAZE_FILENAME))
+
+    word_index = WordIndex(layout['boxes'], layout['identifiers'])
+    word_hits, counts, dwell_times = session_word_hits(
+        times, xs, ys, word_index, layout['screen_width'], layout['screen_height'], max_sample_gap)
+    write_hit_counts_file(os.path.join(directory, HIT_COUNTS_FILENAME), word_hits)
+
+    with open(os.path.join(directory, DWELL_FILENAME), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['identifier', 'word', 'count', 'dwell_time'])
+        for k, identifier in enumerate(layout['identifiers']):
+            writer.writerow([identifier, layout['words'][k], int(counts[k]), f"{dwell_times[k]:.6f}"])
+
+    return {'samples': len(times), 'hits': int(counts.sum()), 'dwell_time': float(dwell_times.sum())}
+
+
+def find_sessions(path):
+    """Yields every directory under path (including itself) that has calibrated data and a layout."""
+    for root, _, files in os.walk(path):
+        if GAZE_FILENAME in files and has_word_layout(root):
+            yield root
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute per-word hit counts and dwell times without playback")
+    parser.add_argument('paths', nargs='+', help="session directories, or data directories to search")
+    parser.add_argument('--max-gap', type=float, default=0.1, help="cap on one sample's dwell time (s)")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for path in args.paths:
+        sessions = sorted(find_sessions(path))
+        if not sessions:
+            print(f"{path}: no sessions with {GAZE_FILENAME} and {LAYOUT_FILENAME}")
+        for session in sessions:
+            try:
+                summary = process_session(session, args.max_gap)
+                print(f"{session}: {summary['hits']}/{summary['samples']} samples on words, "
+                      f"{summary['dwell_time']:.2f}s dwell")
+            except Exception as e:
+                failures += 1
+                print(f"{session}: failed ({e})")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+# word_index.py
+from bisect import bisect_right
+
+import numpy as np
+
+
+class WordIndex:
+    """
+    Spatial index over word bounding boxes laid out in text lines.
+    Boxes are bucketed into line bands by their top edge; a lookup binary-searches
+    the band on y and then the word on x, so each hit test is O(log n).
+    Containment follows QRect.contains: edges are inclusive and the right/bottom
+    edge is x + width - 1 / y + height - 1.
+    Works on plain (x, y, width, height) boxes, so it needs no Qt widgets.
+    """
+    def __init__(self, boxes, identifiers=None):
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        self.boxes = boxes
+        self.identifiers = list(identifiers) if identifiers is not None else list(range(len(boxes)))
+        left, top = boxes[:, 0], boxes[:, 1]
+        right = left + boxes[:, 2] - 1
+        bottom = top + boxes[:, 3] - 1
+
+        # Word order: by line (top edge), then left to right
+        self._order = np.lexsort((left, top))
+        band_tops, band_of_word = np.unique(top[self._order], return_inverse=True)
+        self._band_tops = band_tops.tolist()
+        self._band_starts = np.searchsorted(band_of_word, np.arange(len(band_tops) + 1)).tolist()
+
+        self._left = left[self._order].tolist()
+        self._right = right[self._order].tolist()
+        self._top = top[self._order].tolist()
+        self._bottom = bottom[self._order].tolist()
+
+        # Running maxima let a search walk backwards only as far as a box can still reach
+        band_bottoms = np.maximum.reduceat(bottom[self._order], self._band_starts[:-1]) if len(boxes) else np.empty(0)
+        self._band_reach = np.maximum.accumulate(band_bottoms).tolist()
+        self._right_reach = []
+        for b in range(len(band_tops)):
+            start, stop = self._band_starts[b], self._band_starts[b + 1]
+            self._right_reach.extend(np.maximum.accumulate(right[self._order][start:stop]).tolist())
+
+        # Composite keys for vectorized lookups: band number * span + x
+        self._span = float(right.max() - left.min() + 2) if len(boxes) else 1.0
+        self._origin = float(left.min()) if len(boxes) else 0.0
+        self._band_of_word = band_of_word
+        self._keys = band_of_word * self._span + (left[self._order] - self._origin)
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def lookup(self, x, y):
+        """Returns the indices (into the original box list) of every box containing (x, y)."""
+        hits = []
+        b = bisect_right(self._band_tops, y) - 1
+        while b >= 0 and self._band_reach[b] >= y:
+            start, stop = self._band_starts[b], self._band_starts[b + 1]
+            k = bisect_right(self._left, x, start, stop) - 1
+            while k >= start and self._right_reach[k] >= x:
+                if self._right[k] >= x and self._top[k] <= y <= self._bottom[k]:
+                    hits.append(int(self._order[k]))
+                k -= 1
+            b -= 1
+        return hits
+
+    def lookup_many(self, xs, ys):
+        """
+        Vectorized lookup for many points, e.g. mapping fixations to words offline.
+        Returns one box index per point, or -1 where no box contains it.
+        Assumes words on the same line do not overlap, as laid out by setupLabels.
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        result = np.full(len(xs), -1, dtype=np.int64)
+        if not len(self.boxes):
+            return result
+        band_tops = np.asarray(self._band_tops)
+        band = np.searchsorted(band_tops, ys, side='right') - 1
+        valid = band >= 0
+        keys = np.where(valid, band, 0) * self._span + np.clip(xs - self._origin, -1, self._span - 1)
+        k = np.searchsorted(self._keys, keys, side='right') - 1
+        valid &= k >= 0
+        k = np.where(valid, k, 0)
+        right = np.asarray(self._right)[k]
+        top = np.asarray(self._top)[k]
+        bottom = np.asarray(self._bottom)[k]
+        valid &= (self._band_of_word[k] == band) & (xs <= right) & (ys >= top) & (ys <= bottom)
+        result[valid] = self._order[k[valid]]
+        return result
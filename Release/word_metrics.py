@@ -0,0 +1,172 @@
+# word_metrics.py
+"""
+Per-word eye-movement measures for screening, from the fixations of a session
+and its stored text layout:
+
+    first_fixation_duration  duration of the first fixation on the word in first pass
+    gaze_duration            summed fixations of the first pass on the word
+    total_time               summed duration of every fixation on the word
+    skipped                  not fixated in first pass although later text was read
+    regressions_in / _out    backward moves (to an earlier word) into / out of the word
+
+First pass means the first run of fixations on a word entered before any word
+further along the text. Words are numbered in reading order as laid out on the
+text canvas. Each session gets a word_metrics.csv; --summary aggregates them.
+
+Usage: python word_metrics.py SESSION_OR_DATA_DIR [...] [--method idt|ivt|ihmm] [--summary PATH]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from analysis_engine import AnalysisPipeline
+from screen_coords import normalize_gaze_array
+from session_analysis import session_fixation_stage
+from text_layout import load_word_layout
+from word_hits import GAZE_FILENAME, find_sessions
+from word_index import WordIndex
+
+WORD_METRICS_FILENAME = 'word_metrics.csv'
+WORD_METRIC_COLUMNS = ['word_index', 'identifier', 'word', 'n_fixations', 'first_fixation_duration',
+                       'gaze_duration', 'total_time', 'skipped', 'regressions_in', 'regressions_out']
+
+
+def fixation_words(fix_x, fix_y, word_index, screen_width, screen_height):
+    """The word (index into the layout) under each fixation centre, -1 where there is none."""
+    screen_x, screen_y = normalize_gaze_array(fix_x, fix_y, screen_width, screen_height)
+    return word_index.lookup_many(screen_x, screen_y)
+
+
+def word_reading_measures(word_of_fixation, durations, n_words):
+    """
+    Computes the per-word measures from the fixation sequence in one vectorized pass.
+    A fixation off the text (-1) ends the pass on a word but is otherwise ignored.
+    Returns a dict of arrays of length n_words; durations are NaN for words without
+    a first pass.
+    """
+    word = np.asarray(word_of_fixation, dtype=np.int64)
+    durations = np.asarray(durations, dtype=float)
+    on_text = word >= 0
+
+    measures = {
+        'n_fixations': np.bincount(word[on_text], minlength=n_words),
+        'first_fixation_duration': np.full(n_words, np.nan),
+        'gaze_duration': np.full(n_words, np.nan),
+        'total_time': np.bincount(word[on_text], weights=durations[on_text], minlength=n_words),
+        'skipped': np.zeros(n_words, dtype=bool),
+        'regressions_in': np.zeros(n_words, dtype=np.int64),
+        'regressions_out': np.zeros(n_words, dtype=np.int64)
+    }
+    if not on_text.any():
+        return measures
+
+    # Runs of consecutive fixations on one word (passes), split on the full sequence
+    # so leaving the text ends a pass, then only the runs on a word are kept
+    run_start = np.flatnonzero(np.concatenate(([True], word[1:] != word[:-1])))
+    run_duration = np.add.reduceat(durations, run_start)
+    run_word = word[run_start]
+    on_word = run_word >= 0
+    run_start, run_word, run_duration = run_start[on_word], run_word[on_word], run_duration[on_word]
+
+    # First pass: the word's first run, entered before any word further along
+    furthest_before = np.maximum.accumulate(np.concatenate(([-1], run_word[:-1])))
+    first_run = np.zeros(len(run_word), dtype=bool)
+    first_run[np.unique(run_word, return_index=True)[1]] = True
+    first_pass = first_run & (furthest_before < run_word)
+    measures['first_fixation_duration'][run_word[first_pass]] = durations[run_start[first_pass]]
+    measures['gaze_duration'][run_word[first_pass]] = run_duration[first_pass]
+    measures['skipped'] = np.isnan(measures['gaze_duration']) & (np.arange(n_words) < run_word.max())
+
+    # Regressions: moves from one pass to the next pass on an earlier word, across any off-text fixations
+    source, target = run_word[:-1], run_word[1:]
+    backward = target < source
+    measures['regressions_out'] = np.bincount(source[backward], minlength=n_words)
+    measures['regressions_in'] = np.bincount(target[backward], minlength=n_words)
+    return measures
+
+
+def session_word_metrics(fixations, layout):
+    """The word metrics table of one session from its fixation table and stored layout."""
+    word_index = WordIndex(layout['boxes'], layout['identifiers'])
+    words = fixation_words(fixations['x'], fixations['y'], word_index,
+                           layout['screen_width'], layout['screen_height'])
+    measures = word_reading_measures(words, fixations['duration'], len(word_index))
+    return pd.DataFrame({'word_index': np.arange(len(word_index)), 'identifier': layout['identifiers'],
+                         'word': layout['words'], **measures}, columns=WORD_METRIC_COLUMNS)
+
+
+def write_word_metrics(table, directory):
+    file_path = os.path.join(directory, WORD_METRICS_FILENAME)
+    table.to_csv(file_path, index=False, float_format='%.6f')
+    return file_path
+
+
+def process_session(directory, method='idt'):
+    """
+    Detects the fixations of a session as the screening analysis does, writes its
+    word_metrics.csv and returns the table.
+    """
+    layout = load_word_layout(directory)
+    if layout is None:
+        raise FileNotFoundError(f"No stored text layout in {directory}")
+    pipeline = AnalysisPipeline(fixations=session_fixation_stage(method))
+    fixations = pipeline.fixations(pipeline.load(os.path.join(directory, GAZE_FILENAME)))
+    table = session_word_metrics(fixations, layout)
+    write_word_metrics(table, directory)
+    return table
+
+
+def summarize_word_metrics(tables):
+    """
+    Aggregates session tables (each with a 'session' column added) per word of the
+    text: mean durations over sessions that read the word, skip rate and mean regressions.
+    """
+    combined = pd.concat(tables, ignore_index=True)
+    return combined.groupby(['word_index', 'word'], sort=True).agg(
+        sessions=('session', 'nunique'),
+        first_fixation_duration=('first_fixation_duration', 'mean'),
+        gaze_duration=('gaze_duration', 'mean'),
+        total_time=('total_time', 'mean'),
+        skip_rate=('skipped', 'mean'),
+        regressions_in=('regressions_in', 'mean'),
+        regressions_out=('regressions_out', 'mean')
+    ).reset_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute per-word reading measures for sessions")
+    parser.add_argument('paths', nargs='+', help="session directories, or data directories to search")
+    parser.add_argument('--method', choices=['idt', 'ivt', 'ihmm'], default='idt', help="fixation detector")
+    parser.add_argument('--summary', default=None, help="also write the per-word aggregate over all sessions here")
+    args = parser.parse_args(argv)
+
+    tables, failures = [], 0
+    for path in args.paths:
+        sessions = sorted(find_sessions(path))
+        if not sessions:
+            print(f"{path}: no sessions with {GAZE_FILENAME} and a stored text layout")
+        for session in sessions:
+            try:
+                table = process_session(session, args.method)
+                tables.append(table.assign(session=session))
+                print(f"{session}: {int((table['n_fixations'] > 0).sum())}/{len(table)} words fixated, "
+                      f"{int(table['regressions_in'].sum())} regressions")
+            except Exception as e:
+                failures += 1
+                print(f"{session}: failed ({e})")
+
+    if args.summary and tables:
+        summary = summarize_word_metrics(tables)
+        if args.summary.endswith('.parquet'):
+            summary.to_parquet(args.summary, index=False)
+        else:
+            summary.to_csv(args.summary, index=False, float_format='%.6f')
+        print(f"Summary of {len(tables)} sessions written to: {args.summary}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())